@@ -1,12 +1,46 @@
+import time # Primeiro import: usado pelo perfil de inicialização (STARTUP_PROFILE=1)
+STARTUP_T0 = time.perf_counter()
+STARTUP_PHASES = [] # (fase, segundos)
+_startup_last = [STARTUP_T0]
+
+def mark_startup_phase(name):
+    """Registra quanto tempo a inicialização levou desde a fase anterior."""
+    now = time.perf_counter()
+    STARTUP_PHASES.append((name, now - _startup_last[0]))
+    _startup_last[0] = now
+
 import sqlite3
 import os
+import sys
+import subprocess
 import csv
 from io import StringIO
-from flask import Flask, render_template, request, redirect, url_for, flash, session, g, Response
+mark_startup_phase('import da biblioteca padrão')
+from flask import Flask, render_template, request, redirect, url_for, flash, session, g, Response, send_from_directory, abort, get_flashed_messages
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
+import click
+mark_startup_phase('import do Flask/Werkzeug')
 import logging # Para debug
 import re # Para criar "slugs"
+import base64
+import gzip
+import hashlib
+import json
+import mimetypes
+import posixpath
+import shutil
+import struct
+import tempfile
+import threading
+from datetime import date, datetime, timedelta, timezone
+from dataclasses import dataclass
+from types import MappingProxyType
+from io import BytesIO
+import brotli # Compressão 'br' (respostas dinâmicas e arquivos pré-comprimidos)
+from markupsafe import Markup
+mark_startup_phase('import das demais dependências')
 
 # Configurações básicas
 APP_SECRET_KEY = os.environ.get('FLASK_SECRET_KEY', 'troque_esta_chave_para_producao')
@@ -25,7 +59,61 @@ app.config['UPLOAD_FOLDER_CUSTOM'] = os.path.join(UPLOAD_FOLDER, 'custom')
 app.config['UPLOAD_FOLDER_GALLERY'] = os.path.join(UPLOAD_FOLDER, 'gallery') # NOVO: Pasta para Galeria
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
-ADMIN_PASSWORD_HASH = generate_password_hash(DEFAULT_ADMIN_PASSWORD)
+# Modo "site publicado": a página inicial vira um HTML estático, re-renderizado a cada mudança no admin
+app.config['STATIC_PUBLISH'] = os.environ.get('STATIC_PUBLISH', '0') == '1'
+app.config['PUBLISH_FOLDER'] = os.path.join(app.root_path, 'publish')
+
+# Nº de proxies (ex: nginx) na frente do app. Com 0, o remote_addr é o próprio cliente; com N, o IP
+# do cliente vem do X-Forwarded-For (só as N últimas entradas, as que esses proxies adicionaram)
+app.config['TRUSTED_PROXIES'] = int(os.environ.get('TRUSTED_PROXIES', '0'))
+if app.config['TRUSTED_PROXIES']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+
+# Configuração do limite de envios do formulário público (token bucket por IP e por e-mail)
+# Banco separado: o controle de abuso não disputa o lock de escrita do database.db
+app.config['RATELIMIT_DATABASE'] = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'ratelimit.db')
+# O IP costuma ser compartilhado (NAT das operadoras móveis, redes de escola/ONG): balde folgado,
+# quem limita cada pessoa é o balde por e-mail
+RATE_LIMIT_IP = (20, 1 / 30) # (capacidade, fichas por segundo): rajada de 20 envios, depois 2 por minuto
+RATE_LIMIT_EMAIL = (3, 1 / 1200) # rajada de 3 envios, depois 1 a cada 20 minutos
+DUPLICATE_WINDOW = 3600 # Segundos em que o mesmo envio (nome, e-mail, tipo, mensagem) é ignorado
+
+# Configuração do backup (snapshots do banco + static/uploads em ong/backups)
+app.config['BACKUP_FOLDER'] = os.environ.get('BACKUP_FOLDER', os.path.join(app.root_path, 'backups'))
+app.config['BACKUP_INTERVAL'] = int(os.environ.get('BACKUP_INTERVAL', '0')) # Segundos entre snapshots automáticos (0 = desligado)
+app.config['BACKUP_WAL_INTERVAL'] = int(os.environ.get('BACKUP_WAL_INTERVAL', '10')) # Entre um snapshot e outro, arquiva o WAL a cada N segundos (0 = desligado)
+app.config['BACKUP_KEEP_LAST'] = 24 # Retenção: os N snapshots mais recentes...
+app.config['BACKUP_KEEP_DAYS'] = 30 # ... mais o último de cada dia dos últimos N dias
+
+# Configuração da compressão (gzip/brotli)
+app.config['COMPRESS_MIN_SIZE'] = 500 # Respostas menores que isso (bytes) não compensam comprimir
+COMPRESSIBLE_MIMETYPES = {'text/html', 'text/css', 'text/csv', 'text/plain', 'application/javascript', 'text/javascript', 'application/json', 'image/svg+xml'}
+# Arquivos estáticos que o comando 'build-static' pré-comprime (uploads já são imagens comprimidas)
+PRECOMPRESS_EXTENSIONS = {'css', 'js', 'svg', 'html', 'ttf', 'otf'}
+# Pipeline de assets: bibliotecas de terceiros hospedadas localmente (static/vendor) e bundle em static/dist
+VENDOR_FOLDER = os.path.join(app.static_folder, 'vendor')
+DIST_FOLDER = os.path.join(app.static_folder, 'dist')
+VENDOR_ASSETS = { # arquivo em static/vendor -> origem (versões fixas)
+    'bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.8/dist/css/bootstrap.min.css',
+    'bootstrap.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.8/dist/js/bootstrap.min.js',
+    'popper.min.js': 'https://cdn.jsdelivr.net/npm/@popperjs/core@2.11.8/dist/umd/popper.min.js',
+}
+# Inter 4.001 (OFL): os .woff2 versionados saem do pacote django-unfold 0.91.0, com o mesmo subset das
+# fontes do site (FONT_SUBSET_UNICODES). O 'vendor-assets' refaz exatamente esse processo.
+INTER_SOURCE_WHEEL = ( # (url, sha256)
+    'https://files.pythonhosted.org/packages/cb/e8/2591119368628867284550ee5c337bae1f4b4c0e5a8a59f231899326a26f/django_unfold-0.91.0-py3-none-any.whl',
+    '486a468ec4788e0668a9e73686796b04450709171af4ac213b6d229a8015676a',
+)
+VENDOR_FONTS = { # arquivo em static/vendor -> arquivo dentro do INTER_SOURCE_WHEEL
+    'inter/inter-latin-400-normal.woff2': 'unfold/static/unfold/fonts/inter/Inter-Regular.woff2',
+    'inter/inter-latin-500-normal.woff2': 'unfold/static/unfold/fonts/inter/Inter-Medium.woff2',
+    'inter/inter-latin-700-normal.woff2': 'unfold/static/unfold/fonts/inter/Inter-Bold.woff2',
+}
+# Ordem importa: o style.css vem por último para sobrescrever o Bootstrap
+CSS_BUNDLE_SOURCES = ['vendor/bootstrap.min.css', 'vendor/inter/inter.css', 'style.css']
+JS_BUNDLE_SOURCES = ['vendor/popper.min.js', 'vendor/bootstrap.min.js']
+# Caracteres mantidos no subset das fontes: Latin básico + Latin-1 (acentos do português) e pontuação geral
+FONT_SUBSET_UNICODES = list(range(0x20, 0x7F)) + list(range(0xA0, 0x100)) + list(range(0x2010, 0x2028)) + [0x20AC]
 
 # --- VALORES PADRÃO (para a tabela 'config') ---
 DEFAULT_SOBRE_TEXTO = "Em 2024 nos tornamos ONG, com 6 membros colaboradores em 5 atividades..."
@@ -62,6 +150,18 @@ def get_db():
         db.row_factory = sqlite3.Row
     return db
 
+def mark_site_changed():
+    """Para alterações do admin que não passam pelo banco (ex: arquivos do carrossel)."""
+    g._site_changed = True
+
+def site_changed():
+    """Se a requisição alterou o conteúdo do site: gravou algo no banco ou chamou mark_site_changed().
+    Fica fixado na primeira chamada, pois os próprios hooks de after_request também gravam no banco."""
+    if g.get('_site_changed') is None:
+        db = g.get('_database')
+        g._site_changed = db is not None and db.total_changes > 0
+    return g._site_changed
+
 
 def init_db():
     # Cria as pastas de uploads se não existirem
@@ -72,6 +172,9 @@ def init_db():
 
     db = get_db()
     cursor = db.cursor()
+    # WAL: leitores e o backup online não travam as escritas, e o log pode ser arquivado (ver archive_wal).
+    # O modo fica gravado no arquivo do banco, vale para todas as conexões.
+    cursor.execute("PRAGMA journal_mode=WAL")
     
     # Tabela 1: Interessados
     cursor.execute("""
@@ -147,6 +250,73 @@ def init_db():
     );
     """)
 
+    # NOVO - Tabela 8: Metadados das imagens enviadas (dimensões, cor dominante e placeholder)
+    # 'path' é relativo a static/uploads (ex: 'projetos/muro.png')
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS image_metadata (
+      path TEXT PRIMARY KEY,
+      width INTEGER NOT NULL,
+      height INTEGER NOT NULL,
+      dominant_color TEXT,
+      placeholder TEXT
+    );
+    """)
+
+    # NOVO - Tabelas 9 e 10: Totais de interessados por tipo, por dia e por semana (segunda-feira)
+    # Mantidas pelos triggers abaixo, assim o /admin/stats não precisa varrer 'interessados'
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS signup_rollup_daily (
+      dia TEXT NOT NULL,
+      tipo TEXT NOT NULL,
+      total INTEGER NOT NULL,
+      PRIMARY KEY (dia, tipo)
+    ) WITHOUT ROWID;
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS signup_rollup_weekly (
+      semana TEXT NOT NULL,
+      tipo TEXT NOT NULL,
+      total INTEGER NOT NULL,
+      PRIMARY KEY (semana, tipo)
+    ) WITHOUT ROWID;
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS interessados_rollup_insert AFTER INSERT ON interessados
+    BEGIN
+      INSERT INTO signup_rollup_daily (dia, tipo, total) VALUES ({ROLLUP_DAY_SQL.format(row='NEW')}, NEW.tipo, 1)
+        ON CONFLICT (dia, tipo) DO UPDATE SET total = total + 1;
+      INSERT INTO signup_rollup_weekly (semana, tipo, total) VALUES ({ROLLUP_WEEK_SQL.format(row='NEW')}, NEW.tipo, 1)
+        ON CONFLICT (semana, tipo) DO UPDATE SET total = total + 1;
+    END;
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS interessados_rollup_delete AFTER DELETE ON interessados
+    BEGIN
+      UPDATE signup_rollup_daily SET total = total - 1 WHERE dia = {ROLLUP_DAY_SQL.format(row='OLD')} AND tipo = OLD.tipo;
+      UPDATE signup_rollup_weekly SET total = total - 1 WHERE semana = {ROLLUP_WEEK_SQL.format(row='OLD')} AND tipo = OLD.tipo;
+    END;
+    """)
+    # NOVO - Tabela 11: Versão de cada painel do admin (invalida o cache dos fragmentos)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS admin_panel_versions (
+      panel TEXT PRIMARY KEY,
+      version INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    """)
+    # O painel de interessados também muda pelo formulário público, não só pelo admin
+    for event in ('INSERT', 'DELETE'):
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS interessados_panel_{event.lower()} AFTER {event} ON interessados
+        BEGIN
+          {BUMP_PANEL_SQL.replace('?', "'interessados'")};
+        END;
+        """)
+
+    # Banco antigo (interessados sem rollup): preenche uma única vez
+    if (cursor.execute("SELECT EXISTS (SELECT 1 FROM interessados)").fetchone()[0]
+            and not cursor.execute("SELECT EXISTS (SELECT 1 FROM signup_rollup_daily)").fetchone()[0]):
+        backfill_rollups(db)
+
     # --- Insere os valores padrão (se não existirem) ---
     cursor.execute("INSERT OR IGNORE INTO config (key, value) VALUES (?, ?)", ('sobre_texto', DEFAULT_SOBRE_TEXTO))
     cursor.execute("INSERT OR IGNORE INTO config (key, value) VALUES (?, ?)", ('sobre_imagem_filename', DEFAULT_SOBRE_IMAGEM_FILENAME))
@@ -183,6 +353,150 @@ def close_connection(exception):
     db = getattr(g, '_database', None)
     if db is not None:
         db.close()
+    ratelimit_db = getattr(g, '_ratelimit_db', None)
+    if ratelimit_db is not None:
+        ratelimit_db.close()
+
+
+# ----------- Estatísticas (rollups de interessados) -----------
+
+# Chave do dia e da semana (segunda-feira) de um registro de 'interessados'
+ROLLUP_DAY_SQL = "date({row}.data_envio)"
+ROLLUP_WEEK_SQL = "date({row}.data_envio, '-6 days', 'weekday 1')"
+STATS_DAYS = 30 # Dias exibidos no gráfico diário
+STATS_WEEKS = 12 # Semanas exibidas no gráfico semanal
+
+def backfill_rollups(db):
+    """Recalcula os rollups a partir de todos os registros (única consulta que varre 'interessados')."""
+    db.execute("DELETE FROM signup_rollup_daily")
+    db.execute("DELETE FROM signup_rollup_weekly")
+    db.execute(f"""
+        INSERT INTO signup_rollup_daily (dia, tipo, total)
+        SELECT {ROLLUP_DAY_SQL.format(row='i')}, i.tipo, COUNT(*) FROM interessados i GROUP BY 1, 2
+    """)
+    db.execute(f"""
+        INSERT INTO signup_rollup_weekly (semana, tipo, total)
+        SELECT {ROLLUP_WEEK_SQL.format(row='i')}, i.tipo, COUNT(*) FROM interessados i GROUP BY 1, 2
+    """)
+    db.commit()
+
+def build_series(rows, keys, label_prefix=''):
+    """Monta [{'key', 'label', 'total', 'por_tipo'}] para cada bucket em 'keys', com zero onde não houve envio."""
+    buckets = {}
+    for key in keys:
+        label = label_prefix + date.fromisoformat(key).strftime('%d/%m')
+        buckets[key] = {'key': key, 'label': label, 'total': 0, 'por_tipo': {}}
+    for row in rows:
+        bucket = buckets.get(row[0])
+        if bucket is not None and row['total'] > 0:
+            bucket['total'] += row['total']
+            bucket['por_tipo'][row['tipo']] = row['total']
+    return [buckets[key] for key in keys]
+
+def get_signup_stats():
+    """Séries diária/semanal e totais por tipo, lidos só das tabelas de rollup (O(buckets))."""
+    db = get_db()
+    today = datetime.now(timezone.utc).date() # data_envio é gravado em UTC (CURRENT_TIMESTAMP)
+    days = [(today - timedelta(days=i)).isoformat() for i in range(STATS_DAYS - 1, -1, -1)]
+    monday = today - timedelta(days=today.weekday())
+    weeks = [(monday - timedelta(weeks=i)).isoformat() for i in range(STATS_WEEKS - 1, -1, -1)]
+    daily = db.execute("SELECT dia, tipo, total FROM signup_rollup_daily WHERE dia >= ?", (days[0],)).fetchall()
+    weekly = db.execute("SELECT semana, tipo, total FROM signup_rollup_weekly WHERE semana >= ?", (weeks[0],)).fetchall()
+    por_tipo = db.execute("""
+        SELECT tipo, SUM(total) AS total FROM signup_rollup_weekly
+        GROUP BY tipo HAVING SUM(total) > 0 ORDER BY total DESC
+    """).fetchall()
+    return {
+        'daily': build_series(daily, days),
+        'weekly': build_series(weekly, weeks, label_prefix='Semana de '),
+        'por_tipo': por_tipo,
+        'total': sum(row['total'] for row in por_tipo),
+    }
+
+
+# ----------- Painéis do Admin (fragmentos com cache por versão) -----------
+
+BUMP_PANEL_SQL = "INSERT INTO admin_panel_versions (panel, version) VALUES (?, 1) ON CONFLICT (panel) DO UPDATE SET version = version + 1"
+
+def get_interessados():
+    db = get_db()
+    cursor = db.execute("SELECT * FROM interessados ORDER BY data_envio DESC")
+    return cursor.fetchall()
+
+# painel -> (título, função que busca os dados do template admin_panels/<painel>.html), na ordem da página
+ADMIN_PANELS = {
+    'fundo': ('Gerenciar Fundo do Site (Global)', lambda: {'background_image_filename': get_background_image()}),
+    'carrossel': ('Gerenciar Carrossel (Banner)', lambda: {'carousel_images': get_carousel_images()}),
+    'secoes': ('Gerenciar Seções Personalizadas', lambda: {'custom_sections': get_custom_sections()}),
+    'sobre': ('Editar Seção "Sobre a ONG"', lambda: {'sobre_data': get_sobre_data()}),
+    'projetos': ('Gerenciar Projetos', lambda: {'projetos': get_projetos()}),
+    'interessados': ('Interessados (Formulário "Como Ajudar")', lambda: {'entries': get_interessados()}),
+    'contatos': ('Gerenciar Informações de Contato', lambda: {'contatos': get_contatos()}),
+    'galeria': ('Gerenciar Galeria "Nossa Galera"', lambda: {'gallery_images': get_gallery_images()}),
+    'membros': ('Gerenciar Membros da ONG (Interno)', lambda: {'membros': get_membros()}),
+}
+
+# Rota de alteração -> painéis cujo conteúdo ela muda (interessados é versionado pelos triggers)
+ADMIN_PANEL_ENDPOINTS = {
+    # O carrossel lista todas as imagens da raiz de static/uploads, onde também ficam as do "Sobre" e do fundo
+    'admin_upload': ('carrossel',),
+    'admin_delete_image': ('carrossel', 'sobre', 'fundo'),
+    'admin_update_sobre': ('sobre',),
+    'admin_upload_sobre_imagem': ('sobre', 'carrossel'),
+    'admin_update_contatos': ('contatos',),
+    'admin_upload_background': ('fundo', 'carrossel'),
+    'admin_delete_background': ('fundo', 'carrossel'),
+    'admin_add_membro': ('membros',),
+    'admin_delete_membro': ('membros', 'projetos'), # O líder some da lista de projetos
+    'admin_add_projeto': ('projetos',),
+    'admin_delete_projeto': ('projetos',),
+    'admin_set_lider': ('projetos',),
+    'admin_add_membro_projeto': ('projetos',),
+    'admin_remove_membro_projeto': ('projetos',),
+    'admin_add_section': ('secoes',),
+    'admin_delete_section': ('secoes',),
+    'admin_add_gallery_image': ('galeria',),
+    'admin_delete_gallery_image': ('galeria',),
+}
+
+_admin_panel_cache = {} # painel -> (etag, html) do worker
+
+def get_panel_version(name):
+    row = get_db().execute("SELECT version FROM admin_panel_versions WHERE panel = ?", (name,)).fetchone()
+    return row['version'] if row else 0
+
+@app.after_request
+def bump_admin_panel_versions(response):
+    """Depois de uma alteração no admin, invalida o cache só dos painéis afetados."""
+    panels = ADMIN_PANEL_ENDPOINTS.get(request.endpoint)
+    if request.method == 'POST' and panels and site_changed():
+        db = get_db()
+        db.executemany(BUMP_PANEL_SQL, [(name,) for name in panels])
+        db.commit()
+    return response
+
+def admin_panel_etag(name):
+    template_path = os.path.join(app.root_path, app.template_folder, f'admin_panels/{name}.html')
+    return f"{name}-{get_panel_version(name)}-{int(os.path.getmtime(template_path))}"
+
+def render_admin_panel(name, etag):
+    """HTML do painel (sem mensagens flash), re-renderizado só quando a versão (etag) muda."""
+    cached = _admin_panel_cache.get(name)
+    if cached and cached[0] == etag:
+        return cached[1]
+    title, loader = ADMIN_PANELS[name]
+    html = render_template(f'admin_panels/{name}.html', **loader())
+    _admin_panel_cache[name] = (etag, html)
+    return html
+
+def redirect_admin(panel):
+    """Volta para o painel alterado: só o fragmento (envio via fetch) ou, sem JavaScript, a página
+    com todos os painéis prontos, na âncora do painel."""
+    if request.headers.get('X-Admin-Panel'):
+        # Os outros painéis afetados vão junto, para o navegador recarregá-los (ver X-Admin-Refresh)
+        others = [name for name in ADMIN_PANEL_ENDPOINTS.get(request.endpoint, ()) if name != panel]
+        return redirect(url_for('admin_panel', name=panel, atualizar=','.join(others) or None))
+    return redirect(url_for('admin', completo=1, _anchor='painel-' + panel))
 
 
 # ----------- Funções Auxiliares (Helpers) -----------
@@ -207,39 +521,11 @@ def get_projetos():
     """)
     return cursor.fetchall()
 
-def get_sobre_data():
-    db = get_db()
-    cursor = db.execute("SELECT key, value FROM config WHERE key = 'sobre_texto' OR key = 'sobre_imagem_filename'")
-    results = cursor.fetchall()
-    data = {'texto': DEFAULT_SOBRE_TEXTO, 'imagem_filename': DEFAULT_SOBRE_IMAGEM_FILENAME}
-    for row in results:
-        if row['key'] == 'sobre_texto': data['texto'] = row['value']
-        elif row['key'] == 'sobre_imagem_filename': data['imagem_filename'] = row['value']
-    return data
-
 def get_membros():
     db = get_db()
     cursor = db.execute("SELECT * FROM membros ORDER BY nome")
     return cursor.fetchall()
 
-def get_contatos():
-    db = get_db()
-    cursor = db.execute("SELECT key, value FROM config WHERE key LIKE 'contato_%'")
-    results = cursor.fetchall()
-    defaults = {'contato_endereco': '', 'contato_email': '', 'contato_telefones': ''}
-    db_contatos = {row['key']: row['value'] for row in results}
-    contatos = {}
-    for key in defaults:
-        contatos[key.replace('contato_', '')] = db_contatos.get(key, defaults[key])
-    return contatos
-
-def get_background_image():
-    db = get_db()
-    cursor = db.cursor()
-    cursor.execute("SELECT value FROM config WHERE key = 'background_image_filename'")
-    result = cursor.fetchone()
-    return result['value'] if result and result['value'] else None
-
 def get_custom_sections():
     """Busca todas as seções personalizadas, ordenadas."""
     db = get_db()
@@ -254,6 +540,997 @@ def get_gallery_images():
     return cursor.fetchall()
 
 
+# ----------- Limite de Envios (anti-abuso do formulário público) -----------
+
+def get_ratelimit_db():
+    """Conexão com o banco do rate limit (compartilhado entre workers, dados descartáveis)."""
+    db = getattr(g, '_ratelimit_db', None)
+    if db is None:
+        db = g._ratelimit_db = sqlite3.connect(app.config['RATELIMIT_DATABASE'], timeout=2, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=OFF") # Perder o estado num crash só "perdoa" os baldes
+        db.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL) WITHOUT ROWID")
+        db.execute("CREATE TABLE IF NOT EXISTS recent_submissions (digest BLOB PRIMARY KEY, seen REAL NOT NULL) WITHOUT ROWID")
+    return db
+
+def bucket_tokens(db, key, limit, now):
+    """Token bucket: fichas disponíveis agora (repostas pelo tempo passado desde a última atualização)."""
+    capacity, refill_rate = limit
+    row = db.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+    return capacity if row is None else min(capacity, row[0] + (now - row[1]) * refill_rate)
+
+def take_tokens(db, buckets, now):
+    """Consome uma ficha de cada balde [(chave, limite)], só se todos tiverem ficha."""
+    tokens = [bucket_tokens(db, key, limit, now) for key, limit in buckets]
+    allowed = all(t >= 1 for t in tokens)
+    db.executemany(
+        "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+        [(key, t - 1 if allowed else t, now) for (key, limit), t in zip(buckets, tokens)]
+    )
+    return allowed
+
+def check_signup_allowed(ip, nome, email, tipo, mensagem):
+    """Decide se um envio do formulário pode ir para o banco: 'ok', 'duplicate' ou 'limited'."""
+    email = email.lower()
+    digest = hashlib.sha1('\x1f'.join((nome.lower(), email, tipo, ' '.join(mensagem.split()))).encode('utf-8')).digest()
+    now = time.time()
+    db = get_ratelimit_db()
+    try:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT seen FROM recent_submissions WHERE digest = ?", (digest,)).fetchone()
+            if row is not None and now - row[0] < DUPLICATE_WINDOW:
+                result = 'duplicate'
+            elif take_tokens(db, [('ip:' + ip, RATE_LIMIT_IP), ('email:' + email, RATE_LIMIT_EMAIL)], now):
+                db.execute("INSERT OR REPLACE INTO recent_submissions (digest, seen) VALUES (?, ?)", (digest, now))
+                result = 'ok'
+            else:
+                result = 'limited'
+            # Limpeza barata: remove registros que já voltariam ao estado inicial
+            db.execute("DELETE FROM recent_submissions WHERE seen < ?", (now - DUPLICATE_WINDOW,))
+            db.execute("DELETE FROM buckets WHERE updated < ?", (now - max(c / r for c, r in (RATE_LIMIT_IP, RATE_LIMIT_EMAIL)),))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+    except sqlite3.Error as e:
+        # Se o controle de abuso falhar, não bloqueia quem está se inscrevendo
+        app.logger.error(f"Erro no rate limit do formulário: {e}")
+        return 'ok'
+    return result
+
+
+# ----------- Config (cache em memória da tabela 'config') -----------
+
+# Valores usados quando a chave não existe (ou é NULL) na tabela
+CONFIG_DEFAULTS = {
+    'sobre_texto': DEFAULT_SOBRE_TEXTO,
+    'sobre_imagem_filename': DEFAULT_SOBRE_IMAGEM_FILENAME,
+    'background_image_filename': DEFAULT_BACKGROUND_IMAGE_FILENAME,
+    'contato_endereco': '',
+    'contato_email': '',
+    'contato_telefones': '',
+    'admin_username': ADMIN_USERNAME,
+    'admin_password_hash': None, # Gerado na primeira tentativa de login (ou pelo 'flask set-admin-password')
+}
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Cópia imutável da tabela 'config', com acessores tipados."""
+    values: MappingProxyType
+    data_version: int
+
+    def get_str(self, key):
+        value = self.values.get(key)
+        return value if value is not None else CONFIG_DEFAULTS.get(key)
+
+    def get_filename(self, key):
+        # Nome de arquivo vazio/NULL significa "sem imagem"
+        return self.get_str(key) or None
+
+    @property
+    def sobre_texto(self):
+        return self.get_str('sobre_texto')
+
+    @property
+    def sobre_imagem_filename(self):
+        return self.get_filename('sobre_imagem_filename')
+
+    @property
+    def background_image_filename(self):
+        return self.get_filename('background_image_filename')
+
+    @property
+    def admin_username(self):
+        return self.get_str('admin_username')
+
+    @property
+    def admin_password_hash(self):
+        return self.get_str('admin_password_hash')
+
+    @property
+    def contatos(self):
+        return {key.replace('contato_', ''): self.get_str(key) for key in ('contato_endereco', 'contato_email', 'contato_telefones')}
+
+# Uma conexão dedicada por worker: o 'PRAGMA data_version' dela muda quando outra conexão
+# (de qualquer worker) faz commit no banco, o que indica que o snapshot pode estar velho.
+_config_state = {'conn': None, 'pid': None, 'snapshot': None}
+_config_lock = threading.Lock()
+
+def load_config_snapshot():
+    """Retorna o snapshot do worker, recarregando a tabela só se o banco mudou."""
+    with _config_lock:
+        if _config_state['pid'] != os.getpid():
+            # Conexões SQLite não podem ser herdadas por fork (ex: gunicorn --preload)
+            _config_state.update(conn=sqlite3.connect(DATABASE, check_same_thread=False), pid=os.getpid(), snapshot=None)
+        conn = _config_state['conn']
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        snapshot = _config_state['snapshot']
+        if snapshot is None or snapshot.data_version != version:
+            try:
+                rows = conn.execute("SELECT key, value FROM config").fetchall()
+            except sqlite3.OperationalError:
+                rows = [] # Tabela ainda não criada (init_db não rodou)
+            snapshot = _config_state['snapshot'] = ConfigSnapshot(MappingProxyType(dict(rows)), version)
+        return snapshot
+
+def get_config():
+    """Snapshot da config para a requisição atual (checa o banco uma única vez por requisição)."""
+    snapshot = getattr(g, '_config', None)
+    if snapshot is None:
+        snapshot = g._config = load_config_snapshot()
+    return snapshot
+
+def set_config_many(values):
+    """Grava várias chaves da config numa única transação (junto com o que já estiver pendente em get_db())."""
+    db = get_db()
+    try:
+        db.executemany("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", list(values.items()))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    g.pop('_config', None) # A próxima leitura nesta requisição já vê os valores novos
+
+def get_sobre_data():
+    config = get_config()
+    return {'texto': config.sobre_texto, 'imagem_filename': config.sobre_imagem_filename}
+
+def get_contatos():
+    return get_config().contatos
+
+def get_background_image():
+    return get_config().background_image_filename
+
+
+# ----------- Credenciais do Admin -----------
+
+def get_admin_credentials():
+    """(usuário, hash da senha) do admin, guardados na tabela 'config'.
+
+    O hash é lento de propósito (scrypt/PBKDF2), então não é calculado no import: se ainda não
+    existir, é gerado a partir de ADMIN_PASS na primeira tentativa de login e salvo no banco.
+    """
+    config = get_config()
+    password_hash = config.admin_password_hash
+    if not password_hash:
+        password_hash = generate_password_hash(DEFAULT_ADMIN_PASSWORD)
+        set_config_many({'admin_password_hash': password_hash})
+    return config.admin_username, password_hash
+
+
+# ----------- Metadados de Imagem (dimensões e placeholders) -----------
+
+LQIP_MAX_SIZE = 16 # Lado maior (em pixels) do placeholder embutido no HTML
+
+def compute_image_metadata(filepath):
+    """Lê dimensões, cor dominante e gera um placeholder minúsculo (LQIP) em data URI."""
+    from PIL import Image # Só é necessário nos uploads (não pesa no boot dos workers)
+    with Image.open(filepath) as img:
+        width, height = img.size
+        img.draft('RGB', (LQIP_MAX_SIZE * 4, LQIP_MAX_SIZE * 4)) # Acelera a decodificação de JPEGs grandes
+        rgb = img.convert('RGB')
+    # Cor dominante = média da imagem (redução para 1x1 pixel)
+    r, gr, b = rgb.resize((1, 1), Image.BOX).getpixel((0, 0))
+    dominant_color = '#{:02x}{:02x}{:02x}'.format(r, gr, b)
+    rgb.thumbnail((LQIP_MAX_SIZE, LQIP_MAX_SIZE))
+    buf = BytesIO()
+    rgb.save(buf, format='JPEG', quality=50)
+    placeholder = 'data:image/jpeg;base64,' + base64.b64encode(buf.getvalue()).decode('ascii')
+    return {'width': width, 'height': height, 'dominant_color': dominant_color, 'placeholder': placeholder}
+
+def save_image_metadata(db, relpath):
+    """Calcula e grava os metadados de uma imagem de static/uploads (sem commit)."""
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], relpath)
+    try:
+        meta = compute_image_metadata(filepath)
+    except Exception as e:
+        # Sem metadados a imagem ainda é exibida, só não tem placeholder
+        app.logger.error(f"Erro ao ler metadados da imagem {relpath}: {e}")
+        return None
+    db.execute(
+        "INSERT OR REPLACE INTO image_metadata (path, width, height, dominant_color, placeholder) VALUES (?, ?, ?, ?, ?)",
+        (relpath, meta['width'], meta['height'], meta['dominant_color'], meta['placeholder'])
+    )
+    return meta
+
+def delete_image_metadata(db, relpath):
+    db.execute("DELETE FROM image_metadata WHERE path = ?", (relpath,))
+
+def get_image_metadata():
+    """Busca todos os metadados de imagem (uma consulta por requisição)."""
+    metadata = getattr(g, '_image_metadata', None)
+    if metadata is None:
+        cursor = get_db().execute("SELECT * FROM image_metadata")
+        metadata = g._image_metadata = {row['path']: row for row in cursor.fetchall()}
+    return metadata
+
+@app.context_processor
+def inject_image_attrs():
+    def image_attrs(relpath):
+        """Atributos width/height e placeholder para uma <img>, evitando reflow no carregamento."""
+        meta = get_image_metadata().get(relpath)
+        if meta is None:
+            return ''
+        style = f"background-color:{meta['dominant_color']};"
+        if meta['placeholder']:
+            style += f"background-image:url({meta['placeholder']});background-size:cover;background-position:center;"
+        # O fundo sai quando a imagem carrega: PNG/GIF/WEBP transparentes não ficam com o placeholder atrás
+        return Markup('width="{}" height="{}" style="{}" onload="this.style.background=\'\'"').format(meta['width'], meta['height'], style)
+    return {'image_attrs': image_attrs}
+
+
+# ----------- Compressão (gzip/brotli) -----------
+
+def choose_encoding():
+    """Escolhe a melhor codificação aceita pelo cliente ('br', 'gzip' ou None)."""
+    accept = request.accept_encodings
+    if accept.quality('br') > 0:
+        return 'br'
+    if accept.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+def compress_bytes(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=5) # Qualidade média: bom ganho sem pesar na CPU por requisição
+    return gzip.compress(data, compresslevel=6)
+
+@app.after_request
+def compress_response(response):
+    """Comprime respostas dinâmicas (HTML, CSV...) quando o cliente aceita."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < app.config['COMPRESS_MIN_SIZE']:
+        return response
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+    response.set_data(compress_bytes(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # O corpo mudou de bytes: um ETag forte não pode valer para as três codificações
+        response.set_etag(etag, weak=True)
+    return response
+
+def static_precompressed(filename):
+    """Serve a variante .br/.gz gerada pelo 'build-static' quando existir e o cliente aceitar."""
+    response = send_precompressed(app.static_folder, filename)
+    if filename.startswith('dist/'):
+        # Arquivos do bundle têm o hash no nome: podem ficar em cache para sempre
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    return response
+
+def send_precompressed(folder, filename):
+    encoding = choose_encoding()
+    if encoding:
+        suffix = '.br' if encoding == 'br' else '.gz'
+        source = os.path.join(folder, filename)
+        variant = source + suffix
+        # Só usa a variante se ela não estiver desatualizada em relação ao original
+        if (os.path.isfile(variant) and os.path.isfile(source)
+                and os.path.getmtime(variant) >= os.path.getmtime(source)):
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(folder, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+    response = send_from_directory(folder, filename)
+    response.vary.add('Accept-Encoding')
+    return response
+
+def write_precompressed(path, data):
+    """Grava as variantes .gz e .br de um arquivo (nível máximo: é feito uma vez, não por requisição)."""
+    with open(path + '.gz', 'wb') as fh:
+        fh.write(gzip.compress(data, compresslevel=9))
+    with open(path + '.br', 'wb') as fh:
+        fh.write(brotli.compress(data, quality=11))
+
+app.view_functions['static'] = static_precompressed
+
+
+# ----------- Pipeline de Assets (bundle + CSS crítico) -----------
+
+_asset_manifest = {'mtime': None, 'data': None}
+
+def load_asset_manifest():
+    """Lê o manifest gerado pelo 'build-static' (recarrega só se o arquivo mudar)."""
+    path = os.path.join(DIST_FOLDER, 'manifest.json')
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None # Build ainda não rodou
+    if _asset_manifest['mtime'] != mtime:
+        with open(path, encoding='utf-8') as fh:
+            data = json.load(fh)
+        with open(os.path.join(app.static_folder, data['critical']), encoding='utf-8') as fh:
+            data['critical_css'] = fh.read()
+        _asset_manifest.update(mtime=mtime, data=data)
+    return _asset_manifest['data']
+
+@app.context_processor
+def inject_assets():
+    manifest = load_asset_manifest()
+    if manifest is None:
+        # Sem build: usa os arquivos locais separados (continua sem depender de CDN)
+        return {'assets': {
+            'css': [url_for('static', filename=f) for f in CSS_BUNDLE_SOURCES],
+            'js': [url_for('static', filename=f) for f in JS_BUNDLE_SOURCES],
+            'critical_css': None,
+        }}
+    return {'assets': {
+        'css': [url_for('static', filename=manifest['css'])],
+        'js': [url_for('static', filename=manifest['js'])],
+        'critical_css': Markup(manifest['critical_css']),
+    }}
+
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+def rewrite_css_urls(css, source):
+    """Troca url() relativas por caminhos absolutos de /static (o bundle e o CSS inline mudam de pasta)."""
+    base = posixpath.dirname(source)
+    def absolute(match):
+        quote, ref = match.group(1), match.group(2)
+        return f"url({quote}{app.static_url_path}/{posixpath.normpath(posixpath.join(base, ref))}{quote})"
+    return re.sub(r"url\((['\"]?)(?!data:|https?:|/|#)([^'\")]+)\1\)", absolute, css)
+
+def prefer_woff2_fonts(css):
+    """Põe na frente do src das @font-face o .woff2 gerado pelo build, quando ele existe."""
+    def add_woff2(match):
+        prefix, quote, path = match.groups()
+        woff2 = path + '.woff2'
+        if not os.path.isfile(os.path.join(app.static_folder, woff2[len(app.static_url_path) + 1:])):
+            return match.group(0)
+        return f"{prefix}url({quote}{woff2}{quote}) format('woff2'), {match.group(0)[len(prefix):]}"
+    pattern = r"(src:\s*)url\((['\"]?)(" + re.escape(app.static_url_path) + r"/[^'\")]+)\.(?:ttf|otf)\2\)"
+    return re.sub(pattern, add_woff2, css)
+
+def split_css_rules(css):
+    """Divide CSS (sem comentários) em regras de nível superior: lista de (prelude, corpo)."""
+    rules = []
+    i = 0
+    while True:
+        start = css.find('{', i)
+        if start == -1:
+            break
+        depth, end = 1, start + 1
+        while end < len(css) and depth:
+            if css[end] == '{':
+                depth += 1
+            elif css[end] == '}':
+                depth -= 1
+            end += 1
+        # Descarta instruções soltas antes da regra (ex: @charset "UTF-8";)
+        prelude = css[i:start].rsplit(';', 1)[-1].strip()
+        rules.append((prelude, css[start + 1:end - 1]))
+        i = end
+    return rules
+
+def split_selectors(prelude):
+    """Separa a lista de seletores por vírgula, respeitando parênteses (ex: :not(a, b))."""
+    selectors, depth, current = [], 0, ''
+    for ch in prelude:
+        if ch == ',' and depth == 0:
+            selectors.append(current)
+            current = ''
+            continue
+        depth += (ch == '(') - (ch == ')')
+        current += ch
+    selectors.append(current)
+    return [sel.strip() for sel in selectors if sel.strip()]
+
+def selector_is_used(selector, used):
+    # Pseudo-classes/elementos e atributos não decidem nada (ex: :hover, ::before, :not(.x), [type=button])
+    simple = re.sub(r'::?[\w-]+(\([^)]*\))?', '', selector)
+    simple = re.sub(r'\[[^\]]*\]', '', simple)
+    for cls in re.findall(r'\.([\w-]+)', simple):
+        if cls not in used['classes']:
+            return False
+    for ident in re.findall(r'#([\w-]+)', simple):
+        if ident not in used['ids']:
+            return False
+    for tag in re.findall(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)', simple):
+        if tag.lower() not in used['tags']:
+            return False
+    return True
+
+def extract_critical_css(css, used):
+    """Mantém só as regras cujos seletores aparecem no conteúdo acima da dobra."""
+    out = []
+    for prelude, body in split_css_rules(css):
+        if prelude.startswith(('@media', '@supports')):
+            inner = extract_critical_css(body, used)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@font-face'):
+            out.append(f'{prelude}{{{body}}}') # Inicia o download das fontes o quanto antes
+        elif prelude.startswith('@'):
+            continue # @keyframes, @page... ficam só no bundle completo
+        else:
+            selectors = [sel for sel in split_selectors(prelude) if selector_is_used(sel, used)]
+            if selectors:
+                out.append(','.join(selectors) + '{' + body + '}')
+    return ''.join(out)
+
+def collect_critical_tokens():
+    """Classes, ids e tags usados acima da dobra: base.html (navbar, alertas) + primeiro card da home."""
+    with open(os.path.join(app.root_path, app.template_folder, 'base.html'), encoding='utf-8') as fh:
+        html = fh.read()
+    with open(os.path.join(app.root_path, app.template_folder, 'index.html'), encoding='utf-8') as fh:
+        parts = fh.read().split('class="content-section"')
+    html += 'class="content-section"'.join(parts[:2])
+    used = {'classes': set(), 'ids': set(), 'tags': {'html', 'body'}}
+    for attr in re.findall(r'class="([^"]*)"', html):
+        # Inclui classes que vêm de expressões Jinja, como {{ 'active' if loop.first }}
+        used['classes'].update(re.findall(r'[A-Za-z][\w-]*', attr))
+    for attr in re.findall(r'id="([^"]*)"', html):
+        used['ids'].update(re.findall(r'[A-Za-z][\w-]*', attr))
+    used['tags'].update(tag.lower() for tag in re.findall(r'<([a-zA-Z][a-zA-Z0-9]*)', html))
+    return used
+
+def read_bundle_source(relpath):
+    with open(os.path.join(app.static_folder, relpath), encoding='utf-8') as fh:
+        content = fh.read()
+    # Source maps não são publicados
+    return re.sub(r'^[ \t]*(//# sourceMappingURL=.*|/\*# sourceMappingURL=.*?\*/)[ \t]*$', '', content, flags=re.M)
+
+def subset_font_woff2(source, out):
+    """Converte uma fonte (caminho ou arquivo aberto) para WOFF2 só com os caracteres de FONT_SUBSET_UNICODES."""
+    from fontTools import subset # Só é necessário no build
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    font = subset.load_font(source, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=FONT_SUBSET_UNICODES)
+    subsetter.subset(font)
+    subset.save_font(font, out, options)
+
+def build_asset_bundle():
+    """Gera static/dist/{bundle,critical}.<hash>.css, bundle.<hash>.js e o manifest.json.
+    Retorna o manifest e o tamanho (bytes) de cada arquivo gerado."""
+    css = ''.join(minify_css(prefer_woff2_fonts(rewrite_css_urls(read_bundle_source(f), f))) for f in CSS_BUNDLE_SOURCES)
+    css = re.sub(r'@charset "[^"]*";', '', css) # Arquivos servidos como UTF-8
+    js = ';\n'.join(read_bundle_source(f).strip() for f in JS_BUNDLE_SOURCES)
+    critical = extract_critical_css(css, collect_critical_tokens())
+
+    if os.path.isdir(DIST_FOLDER):
+        for f in os.listdir(DIST_FOLDER):
+            os.remove(os.path.join(DIST_FOLDER, f))
+    os.makedirs(DIST_FOLDER, exist_ok=True)
+    manifest = {}
+    sizes = {}
+    for key, name, ext, content in (('css', 'bundle', 'css', css), ('critical', 'critical', 'css', critical), ('js', 'bundle', 'js', js)):
+        data = content.encode('utf-8')
+        filename = f"{name}.{hashlib.sha256(data).hexdigest()[:10]}.{ext}"
+        with open(os.path.join(DIST_FOLDER, filename), 'wb') as fh:
+            fh.write(data)
+        manifest[key] = 'dist/' + filename
+        sizes[manifest[key]] = len(data)
+    with open(os.path.join(DIST_FOLDER, 'manifest.json'), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest, sizes
+
+
+# ----------- Publicação Estática da Página Inicial -----------
+
+def publish_index():
+    """Grava publish/index.html (+ .gz/.br) com os dados atuais, trocando os arquivos de forma atômica."""
+    folder = app.config['PUBLISH_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    g.pop('_image_metadata', None) # Pode ter mudado nesta mesma requisição
+    # Requisição "limpa" para '/': sem sessão, logo sem mensagens flash de quem disparou a publicação
+    with app.test_request_context('/'):
+        html = render_index_page().encode('utf-8')
+    target = os.path.join(folder, 'index.html')
+    # Nome temporário único (dois POSTs do admin podem publicar ao mesmo tempo em threads do mesmo processo)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix='index.', suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(html)
+    os.chmod(tmp, 0o644) # mkstemp cria com 0600; o nginx precisa ler o arquivo publicado
+    write_precompressed(tmp, html)
+    # os.replace é atômico: quem lê vê a versão antiga ou a nova, nunca um arquivo pela metade
+    os.replace(tmp + '.gz', target + '.gz')
+    os.replace(tmp + '.br', target + '.br')
+    os.replace(tmp, target)
+    return target
+
+def republish_if_enabled():
+    if app.config['STATIC_PUBLISH']:
+        try:
+            publish_index()
+        except Exception as e:
+            app.logger.error(f"Erro ao publicar a página inicial: {e}")
+
+@app.after_request
+def republish_after_admin_change(response):
+    """Ação de gerenciamento (POST em rotas 'admin_*') que alterou algo republica a página inicial."""
+    if (request.method == 'POST' and request.endpoint and request.endpoint.startswith('admin_')
+            and site_changed()):
+        republish_if_enabled()
+    return response
+
+@app.before_request
+def serve_published_index():
+    """Handler mínimo: GET / sem cookie de sessão (sem flash, sem admin logado) recebe o HTML publicado."""
+    if (app.config['STATIC_PUBLISH'] and request.method == 'GET' and request.path == '/'
+            and app.config['SESSION_COOKIE_NAME'] not in request.cookies
+            and os.path.isfile(os.path.join(app.config['PUBLISH_FOLDER'], 'index.html'))):
+        return send_precompressed(app.config['PUBLISH_FOLDER'], 'index.html')
+    return None
+
+
+# ----------- Backup Online (snapshots incrementais) -----------
+
+# Um snapshot = cópia consistente do banco (API de backup do SQLite, em passos curtos) + os arquivos de
+# static/uploads. Tudo vai para um repositório de objetos endereçados por hash (backups/objects), então
+# cada snapshot só grava os pedaços do banco e as imagens que mudaram desde os anteriores. Entre um
+# snapshot e outro, archive_wal() guarda as transações do WAL, para restaurar até um ponto no tempo.
+BACKUP_STEP_PAGES = 64 # Páginas copiadas por passo; entre um passo e outro o banco fica livre para escrita
+BACKUP_STEP_PAUSE = 0.002 # Pausa entre os passos (segundos)
+BACKUP_MAX_RESTARTS = 5 # Uma escrita durante a cópia a faz recomeçar; depois de N vezes, copia num passo só
+BACKUP_CHUNK_SIZE = 64 * 1024 # Múltiplo do tamanho da página: uma página alterada muda um só pedaço
+BACKUP_GC_GRACE = 3600 # Objetos usados há menos que isso não são apagados (snapshot em andamento em outro processo)
+
+_backup_lock = threading.RLock() # archive_wal() chama create_snapshot() quando a cadeia do WAL quebra
+
+class BackupRestarted(Exception):
+    pass
+
+def copy_database_online(src_path, dst_path):
+    """Copia o banco com a API de backup, em passos de BACKUP_STEP_PAGES páginas. Retorna quantas vezes recomeçou."""
+    src = sqlite3.connect(src_path, timeout=10)
+    dst = sqlite3.connect(dst_path)
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining >= last_remaining: # Não avançou: outra conexão escreveu e a cópia recomeçou
+            restarts += 1
+            if restarts > BACKUP_MAX_RESTARTS:
+                raise BackupRestarted()
+        last_remaining = remaining
+        time.sleep(BACKUP_STEP_PAUSE)
+
+    try:
+        try:
+            src.backup(dst, pages=BACKUP_STEP_PAGES, progress=progress)
+        except BackupRestarted:
+            src.backup(dst) # Muitas escritas: um passo só (em WAL, só segura um snapshot de leitura; as escritas seguem)
+    finally:
+        dst.close()
+        src.close()
+    return restarts
+
+def remove_database_file(path):
+    """Apaga o arquivo do banco e os -wal/-shm que o modo WAL cria ao lado."""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def check_database_file(path):
+    conn = sqlite3.connect(path)
+    try:
+        result = conn.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        conn.close()
+    if result != 'ok':
+        raise RuntimeError(f"Banco inválido ({path}): {result}")
+
+def table_row_counts(path):
+    """Nº de linhas de cada tabela do banco (conferência do backup)."""
+    conn = sqlite3.connect(path)
+    try:
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+        return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+    finally:
+        conn.close()
+
+def backup_object_path(backup_folder, digest):
+    return os.path.join(backup_folder, 'objects', digest[:2], digest)
+
+def touch_backup_object(backup_folder, digest):
+    """Retorna se o objeto já existe, marcando-o como recém-usado (ver BACKUP_GC_GRACE)."""
+    path = backup_object_path(backup_folder, digest)
+    if not os.path.exists(path):
+        return False
+    os.utime(path)
+    return True
+
+def store_backup_object(backup_folder, data):
+    """Grava o objeto, se ainda não existir. Retorna (hash, bytes gravados)."""
+    digest = hashlib.sha256(data).hexdigest()
+    if touch_backup_object(backup_folder, digest):
+        return digest, 0
+    path = backup_object_path(backup_folder, digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+    return digest, len(data)
+
+def read_backup_object(backup_folder, digest):
+    with open(backup_object_path(backup_folder, digest), 'rb') as fh:
+        data = fh.read()
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise RuntimeError(f"Objeto de backup corrompido: {digest}")
+    return data
+
+def list_snapshots(backup_folder=None):
+    """IDs dos snapshots (timestamps UTC), do mais antigo para o mais recente."""
+    folder = os.path.join(backup_folder or app.config['BACKUP_FOLDER'], 'snapshots')
+    if not os.path.isdir(folder):
+        return []
+    return sorted(f[:-len('.json')] for f in os.listdir(folder) if f.endswith('.json'))
+
+def load_snapshot(snapshot_id, backup_folder=None):
+    path = os.path.join(backup_folder or app.config['BACKUP_FOLDER'], 'snapshots', snapshot_id + '.json')
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+def create_snapshot(db_path=None, uploads_folder=None, backup_folder=None):
+    """Gera um snapshot do banco e de static/uploads e aplica a retenção. Retorna o manifesto."""
+    db_path = db_path or DATABASE
+    uploads_folder = uploads_folder or app.config['UPLOAD_FOLDER']
+    backup_folder = backup_folder or app.config['BACKUP_FOLDER']
+    with _backup_lock:
+        t0 = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        snapshot_id = now.strftime('%Y%m%d-%H%M%S-%f')
+        os.makedirs(os.path.join(backup_folder, 'snapshots'), exist_ok=True)
+        new_objects = new_bytes = 0
+
+        # 1. Banco: cópia online para um arquivo temporário, quebrada em pedaços de BACKUP_CHUNK_SIZE.
+        # O cabeçalho do WAL é lido antes da cópia: se o log recomeçar durante ela, archive_wal() vê o salt
+        # diferente e começa outra cadeia (reaplicar frames anteriores à cópia não estraga, os posteriores sobrescrevem).
+        wal = read_wal_header(db_path + '-wal')
+        tmp_db = os.path.join(backup_folder, f"{snapshot_id}.db.tmp")
+        try:
+            restarts = copy_database_online(db_path, tmp_db)
+            check_database_file(tmp_db)
+            rows = table_row_counts(tmp_db)
+            chunks = []
+            with open(tmp_db, 'rb') as fh:
+                for data in iter(lambda: fh.read(BACKUP_CHUNK_SIZE), b''):
+                    digest, written = store_backup_object(backup_folder, data)
+                    chunks.append(digest)
+                    new_objects += bool(written)
+                    new_bytes += written
+            db_size = os.path.getsize(tmp_db)
+        finally:
+            remove_database_file(tmp_db)
+
+        # 2. Uploads: arquivo com mesmo tamanho/mtime do último snapshot nem é relido
+        previous = list_snapshots(backup_folder)
+        known = load_snapshot(previous[-1], backup_folder)['uploads'] if previous else {}
+        uploads = {}
+        for root, dirs, files in os.walk(uploads_folder):
+            for f in files:
+                path = os.path.join(root, f)
+                relpath = os.path.relpath(path, uploads_folder).replace(os.sep, '/')
+                st = os.stat(path)
+                entry = known.get(relpath)
+                if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns \
+                        and touch_backup_object(backup_folder, entry['sha256']):
+                    digest = entry['sha256']
+                else:
+                    with open(path, 'rb') as fh:
+                        digest, written = store_backup_object(backup_folder, fh.read())
+                    new_objects += bool(written)
+                    new_bytes += written
+                uploads[relpath] = {'sha256': digest, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+        manifest = {
+            'id': snapshot_id,
+            'created': now.isoformat(timespec='seconds'),
+            'database': {'size': db_size, 'rows': rows, 'chunks': chunks},
+            'uploads': uploads,
+            'stats': {'new_objects': new_objects, 'new_bytes': new_bytes, 'restarts': restarts,
+                      'seconds': round(time.perf_counter() - t0, 3)},
+        }
+        chain = os.path.join(backup_folder, 'wal', snapshot_id)
+        os.makedirs(chain, exist_ok=True)
+        save_wal_state(chain, {'salt': wal['salt'] if wal else None, 'checksum': wal['checksum'] if wal else None,
+                               'offset': WAL_HEADER_SIZE, 'segments': 0})
+        path = os.path.join(backup_folder, 'snapshots', snapshot_id + '.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as fh:
+            json.dump(manifest, fh)
+        os.replace(path + '.tmp', path) # O snapshot só "existe" depois que todos os objetos foram gravados
+
+        prune_snapshots(backup_folder)
+        return manifest
+
+def prune_snapshots(backup_folder=None, keep_last=None, keep_days=None):
+    """Retenção: mantém os keep_last snapshots mais recentes e o último de cada dia dos últimos
+    keep_days dias; depois apaga os objetos que nenhum snapshot restante usa. Retorna (snapshots, objetos) apagados."""
+    backup_folder = backup_folder or app.config['BACKUP_FOLDER']
+    keep_last = app.config['BACKUP_KEEP_LAST'] if keep_last is None else keep_last
+    keep_days = app.config['BACKUP_KEEP_DAYS'] if keep_days is None else keep_days
+    ids = list_snapshots(backup_folder)
+    keep = set(ids[-keep_last:]) if keep_last else set()
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).strftime('%Y%m%d')
+    last_of_day = {}
+    for snapshot_id in ids: # Em ordem: o último de cada dia sobrescreve os anteriores
+        if snapshot_id[:8] >= cutoff:
+            last_of_day[snapshot_id[:8]] = snapshot_id
+    keep.update(last_of_day.values())
+
+    removed_snapshots = 0
+    for snapshot_id in ids:
+        if snapshot_id not in keep:
+            os.remove(os.path.join(backup_folder, 'snapshots', snapshot_id + '.json'))
+            shutil.rmtree(os.path.join(backup_folder, 'wal', snapshot_id), ignore_errors=True)
+            removed_snapshots += 1
+
+    referenced = set()
+    for snapshot_id in keep:
+        manifest = load_snapshot(snapshot_id, backup_folder)
+        referenced.update(manifest['database']['chunks'])
+        referenced.update(entry['sha256'] for entry in manifest['uploads'].values())
+    removed_objects = 0
+    grace_limit = time.time() - BACKUP_GC_GRACE
+    for root, dirs, files in os.walk(os.path.join(backup_folder, 'objects')):
+        for f in files:
+            path = os.path.join(root, f)
+            if f not in referenced and os.path.getmtime(path) < grace_limit:
+                os.remove(path)
+                removed_objects += 1
+    return removed_snapshots, removed_objects
+
+# Arquivamento do WAL: cada transação confirmada vira "frames" (cabeçalho de 24 bytes + página inteira)
+# no fim do arquivo -wal. archive_wal() copia os frames novos para backups/wal/<snapshot>/ e a restauração
+# reaplica as páginas sobre o snapshot, em ordem. Depois de um checkpoint completo o -wal recomeça com outro
+# salt; se isso acontecer antes do arquivamento, frames se perderam e archive_wal() começa outra cadeia.
+WAL_HEADER_SIZE = 32
+WAL_FRAME_HEADER_SIZE = 24
+
+def backup_timestamp(name):
+    """Momento (UTC) de um ID de snapshot ou nome de segmento do WAL."""
+    return datetime.strptime(name[-22:], '%Y%m%d-%H%M%S-%f').replace(tzinfo=timezone.utc)
+
+def wal_checksum(data, s0, s1, byteorder):
+    """Checksum cumulativo do formato WAL do SQLite."""
+    words = struct.unpack(f'{byteorder}{len(data) // 4}I', data)
+    for i in range(0, len(words), 2):
+        s0 = (s0 + words[i] + s1) & 0xFFFFFFFF
+        s1 = (s1 + words[i + 1] + s0) & 0xFFFFFFFF
+    return s0, s1
+
+def read_wal_header(wal_path):
+    """Cabeçalho do -wal ({header, page_size, salt, checksum, byteorder}), ou None se não houver log válido."""
+    try:
+        with open(wal_path, 'rb') as fh:
+            header = fh.read(WAL_HEADER_SIZE)
+    except FileNotFoundError:
+        return None
+    if len(header) < WAL_HEADER_SIZE:
+        return None
+    magic, version, page_size, seq, salt1, salt2, ck1, ck2 = struct.unpack('>8I', header)
+    if magic not in (0x377f0682, 0x377f0683):
+        return None
+    byteorder = '>' if magic & 1 else '<'
+    if wal_checksum(header[:24], 0, 0, byteorder) != (ck1, ck2):
+        return None
+    return {'header': header, 'page_size': page_size, 'salt': [salt1, salt2], 'checksum': [ck1, ck2], 'byteorder': byteorder}
+
+def committed_wal_frames(data, wal, checksum):
+    """Percorre os frames de `data` conferindo salt e checksum, como o SQLite faz ao recuperar o log.
+    Retorna (bytes até o último frame de commit, checksum nesse ponto)."""
+    frame_size = WAL_FRAME_HEADER_SIZE + wal['page_size']
+    offset, end, end_checksum = 0, 0, checksum
+    while offset + frame_size <= len(data):
+        pgno, commit, salt1, salt2, ck1, ck2 = struct.unpack('>6I', data[offset:offset + WAL_FRAME_HEADER_SIZE])
+        if [salt1, salt2] != wal['salt']:
+            break
+        checksum = wal_checksum(data[offset:offset + 8], *checksum, wal['byteorder'])
+        checksum = wal_checksum(data[offset + WAL_FRAME_HEADER_SIZE:offset + frame_size], *checksum, wal['byteorder'])
+        if list(checksum) != [ck1, ck2]: # Frame de uma transação ainda sendo gravada (ou desfeita)
+            break
+        offset += frame_size
+        if commit:
+            end, end_checksum = offset, list(checksum)
+    return end, end_checksum
+
+def load_wal_state(chain):
+    try:
+        with open(os.path.join(chain, 'state.json'), encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+def save_wal_state(chain, state):
+    path = os.path.join(chain, 'state.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as fh:
+        json.dump(state, fh)
+    os.replace(path + '.tmp', path)
+
+def list_wal_segments(snapshot_id, backup_folder=None, until=None):
+    """Segmentos do WAL arquivados depois do snapshot (até `until`, se dado), em ordem."""
+    chain = os.path.join(backup_folder or app.config['BACKUP_FOLDER'], 'wal', snapshot_id)
+    if not os.path.isdir(chain):
+        return []
+    return [os.path.join(chain, f) for f in sorted(os.listdir(chain))
+            if f.endswith('.wal') and (until is None or backup_timestamp(f[:-len('.wal')]) <= until)]
+
+def archive_wal(db_path=None, backup_folder=None):
+    """Copia para a cadeia do snapshot mais recente as transações do -wal confirmadas desde o último
+    arquivamento. Se o log recomeçou antes de ser arquivado (ou não há cadeia), gera um snapshot novo.
+    Retorna quantos frames foram arquivados."""
+    db_path = db_path or DATABASE
+    backup_folder = backup_folder or app.config['BACKUP_FOLDER']
+    with _backup_lock:
+        snapshots = list_snapshots(backup_folder)
+        chain = os.path.join(backup_folder, 'wal', snapshots[-1]) if snapshots else None
+        state = load_wal_state(chain) if chain else None
+        wal = read_wal_header(db_path + '-wal')
+        if state is not None and wal is None and state['salt'] is None:
+            return 0 # Nenhuma escrita desde o snapshot
+        if state is None or wal is None or wal['salt'] != state['salt']:
+            manifest = create_snapshot(db_path, backup_folder=backup_folder)
+            app.logger.info("Cadeia do WAL interrompida: novo snapshot %s", manifest['id'])
+            return 0
+
+        with open(db_path + '-wal', 'rb') as fh:
+            fh.seek(state['offset'])
+            data = fh.read()
+        end, checksum = committed_wal_frames(data, wal, state['checksum'])
+        if not end:
+            return 0
+        now = datetime.now(timezone.utc)
+        state['segments'] += 1
+        path = os.path.join(chain, f"{state['segments']:06d}-{now.strftime('%Y%m%d-%H%M%S-%f')}.wal")
+        with open(path + '.tmp', 'wb') as fh:
+            fh.write(wal['header'])
+            fh.write(data[:end])
+        os.replace(path + '.tmp', path)
+        state.update(offset=state['offset'] + end, checksum=checksum)
+        save_wal_state(chain, state)
+        return end // (WAL_FRAME_HEADER_SIZE + wal['page_size'])
+
+def apply_wal_segments(db_file, segments):
+    """Regrava no arquivo do banco (sem conexões abertas) as páginas dos segmentos, em ordem; o
+    frame de commit traz o tamanho do banco ao fim da transação."""
+    with open(db_file, 'r+b') as db:
+        for path in segments:
+            with open(path, 'rb') as fh:
+                data = fh.read()
+            page_size = struct.unpack('>I', data[8:12])[0]
+            frame_size = WAL_FRAME_HEADER_SIZE + page_size
+            for offset in range(WAL_HEADER_SIZE, len(data), frame_size):
+                pgno, commit = struct.unpack('>II', data[offset:offset + 8])
+                db.seek((pgno - 1) * page_size)
+                db.write(data[offset + WAL_FRAME_HEADER_SIZE:offset + frame_size])
+                if commit:
+                    db.truncate(commit * page_size)
+
+def restore_snapshot(snapshot_id, db_path=None, uploads_folder=None, backup_folder=None, until=None):
+    """Restaura o banco (pela API de backup, sem derrubar as conexões abertas) e os arquivos de
+    static/uploads do snapshot. O banco também recebe as transações do WAL arquivadas depois do
+    snapshot (só até `until`, se dado); os uploads ficam como no snapshot, e os enviados depois dele
+    não são apagados. Retorna (uploads regravados, segmentos do WAL aplicados)."""
+    db_path = db_path or DATABASE
+    uploads_folder = uploads_folder or app.config['UPLOAD_FOLDER']
+    backup_folder = backup_folder or app.config['BACKUP_FOLDER']
+    manifest = load_snapshot(snapshot_id, backup_folder)
+    segments = list_wal_segments(snapshot_id, backup_folder, until)
+
+    tmp_db = db_path + '.restore.tmp'
+    try:
+        with open(tmp_db, 'wb') as fh:
+            for digest in manifest['database']['chunks']:
+                fh.write(read_backup_object(backup_folder, digest))
+        apply_wal_segments(tmp_db, segments)
+        check_database_file(tmp_db)
+        src = sqlite3.connect(tmp_db)
+        dst = sqlite3.connect(db_path, timeout=30)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+    finally:
+        remove_database_file(tmp_db)
+
+    restored = 0
+    for relpath, entry in manifest['uploads'].items():
+        path = os.path.join(uploads_folder, *relpath.split('/'))
+        if os.path.exists(path) and os.path.getsize(path) == entry['size']:
+            with open(path, 'rb') as fh:
+                if hashlib.sha256(fh.read()).hexdigest() == entry['sha256']:
+                    continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as fh:
+            fh.write(read_backup_object(backup_folder, entry['sha256']))
+        os.replace(path + '.tmp', path)
+        restored += 1
+    return restored, len(segments)
+
+def verify_snapshot(snapshot_id, backup_folder=None):
+    """Restaura o snapshot numa pasta temporária e confere: banco íntegro (quick_check), mesmas
+    contagens de linhas do momento do backup e uploads com o mesmo hash; depois restaura de novo
+    com o WAL arquivado e confere o banco resultante. Retorna o tempo da restauração completa
+    (segundos); levanta RuntimeError se algo não bater."""
+    backup_folder = backup_folder or app.config['BACKUP_FOLDER']
+    manifest = load_snapshot(snapshot_id, backup_folder)
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads_folder = os.path.join(tmp, 'uploads')
+        db_path = os.path.join(tmp, 'wal.db')
+        t0 = time.perf_counter()
+        restore_snapshot(snapshot_id, db_path, uploads_folder, backup_folder)
+        seconds = time.perf_counter() - t0
+        check_database_file(db_path)
+
+        db_path = os.path.join(tmp, 'database.db')
+        restore_snapshot(snapshot_id, db_path, uploads_folder, backup_folder, until=backup_timestamp(snapshot_id))
+        check_database_file(db_path)
+        rows = table_row_counts(db_path)
+        if rows != manifest['database']['rows']:
+            raise RuntimeError(f"Contagem de linhas diferente: {rows} != {manifest['database']['rows']}")
+        for relpath, entry in manifest['uploads'].items():
+            with open(os.path.join(uploads_folder, *relpath.split('/')), 'rb') as fh:
+                if hashlib.sha256(fh.read()).hexdigest() != entry['sha256']:
+                    raise RuntimeError(f"Upload restaurado diferente: {relpath}")
+    return seconds
+
+def start_backup_thread(interval, wal_interval=0):
+    """Numa thread em segundo plano, gera um snapshot ao iniciar e a cada `interval` segundos e,
+    com `wal_interval`, arquiva o WAL a cada tantos segundos entre um snapshot e outro."""
+    def loop():
+        # Conexão sempre aberta: a última conexão a fechar faz checkpoint e apaga o -wal, antes do arquivamento
+        keep_open = sqlite3.connect(DATABASE)
+        keep_open.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        next_snapshot = time.monotonic()
+        while True:
+            try:
+                if time.monotonic() >= next_snapshot:
+                    manifest = create_snapshot()
+                    next_snapshot = time.monotonic() + interval
+                    app.logger.info("Backup %s: %d bytes novos em %.2fs", manifest['id'],
+                                    manifest['stats']['new_bytes'], manifest['stats']['seconds'])
+                elif wal_interval:
+                    archive_wal()
+            except Exception:
+                app.logger.exception("Falha no backup automático")
+            time.sleep(wal_interval or interval)
+    thread = threading.Thread(target=loop, name='backup', daemon=True)
+    thread.start()
+    return thread
+
+
 # ----------- Rotas -----------
 
 @app.route('/', methods=['GET', 'POST'])
@@ -268,6 +1545,15 @@ def index():
             flash('Por favor preencha Nome, E-mail e Tipo de interesse.', 'danger')
             return redirect(url_for('index'))
 
+        # Barra bots e envios repetidos antes de tocar no database.db
+        status = check_signup_allowed(request.remote_addr or '', nome, email, tipo, mensagem)
+        if status == 'duplicate':
+            flash('Já recebemos este formulário. Obrigado!', 'info')
+            return redirect(url_for('index'))
+        if status == 'limited':
+            flash('Muitos envios em pouco tempo. Tente novamente mais tarde.', 'warning')
+            return redirect(url_for('index'))
+
         db = get_db()
         db.execute(
             "INSERT INTO interessados (nome, email, tipo, mensagem) VALUES (?, ?, ?, ?)",
@@ -277,6 +1563,11 @@ def index():
         flash('Obrigado! Seu interesse foi registrado.', 'success')
         return redirect(url_for('index'))
 
+    return render_index_page()
+
+
+def render_index_page():
+    """Renderiza a página inicial (usado pela rota e pela publicação estática)."""
     carousel_images = get_carousel_images()
     projetos = get_projetos()
     sobre_data = get_sobre_data()
@@ -304,7 +1595,8 @@ def login():
         username = request.form.get('username', '')
         password = request.form.get('password', '')
 
-        if username == ADMIN_USERNAME and check_password_hash(ADMIN_PASSWORD_HASH, password):
+        admin_username, admin_password_hash = get_admin_credentials()
+        if username == admin_username and check_password_hash(admin_password_hash, password):
             session['admin_logged'] = True
             session['admin_user'] = username
             flash('Login efetuado com sucesso.', 'success')
@@ -343,30 +1635,59 @@ def login_required(f):
 @app.route('/admin')
 @login_required
 def admin():
-    db = get_db()
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM interessados ORDER BY data_envio DESC")
-    entries = cursor.fetchall()
-    
-    carousel_images = get_carousel_images()
-    projetos = get_projetos()
-    sobre_data = get_sobre_data()
-    membros = get_membros()
-    contatos = get_contatos()
+    # Só a "casca" da página: cada painel é carregado depois por admin_panel().
+    # Sem JavaScript (o <noscript> do admin.html leva para ?completo=1) os painéis já vêm prontos, do mesmo cache.
     background_image_filename = get_background_image()
     custom_sections = get_custom_sections() 
-    gallery_images = get_gallery_images() # NOVO
+    panels = [(name, title) for name, (title, loader) in ADMIN_PANELS.items()]
+    panel_html = None
+    if request.args.get('completo') == '1':
+        panel_html = {name: Markup(render_admin_panel(name, admin_panel_etag(name))) for name in ADMIN_PANELS}
     
     return render_template('admin.html', 
-                           entries=entries, 
-                           carousel_images=carousel_images, 
-                           projetos=projetos, 
-                           sobre_data=sobre_data,
-                           membros=membros,
-                           contatos=contatos,
+                           panels=panels,
+                           panel_html=panel_html,
                            background_image_filename=background_image_filename,
-                           custom_sections=custom_sections,
-                           gallery_images=gallery_images) # NOVO
+                           custom_sections=custom_sections)
+
+
+@app.route('/admin/panel/<name>')
+@login_required
+def admin_panel(name):
+    """Fragmento HTML de um painel do admin, com cache (servidor e navegador) pela versão do painel."""
+    if name not in ADMIN_PANELS:
+        abort(404)
+    etag = admin_panel_etag(name)
+    messages = get_flashed_messages(with_categories=True)
+
+    if not messages and request.if_none_match.contains_weak(etag): # Weak: o compress_response enfraquece o ETag
+        response = Response(status=304)
+    else:
+        html = render_admin_panel(name, etag)
+        if messages:
+            html = render_template('admin_panels/_flashes.html', messages=messages) + html
+        response = Response(html, mimetype='text/html')
+    if not messages:
+        response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True # Sempre revalida (If-None-Match -> 304)
+    others = [other for other in request.args.get('atualizar', '').split(',') if other in ADMIN_PANELS]
+    if others:
+        response.headers['X-Admin-Refresh'] = ','.join(others)
+    return response
+
+
+@app.route('/admin/stats')
+@login_required
+def admin_stats():
+    stats = get_signup_stats()
+    background_image_filename = get_background_image()
+    custom_sections = get_custom_sections()
+
+    return render_template('admin_stats.html',
+                           stats=stats,
+                           background_image_filename=background_image_filename,
+                           custom_sections=custom_sections)
 
 
 @app.route('/delete/<int:entry_id>', methods=['POST'])
@@ -376,7 +1697,7 @@ def delete_entry(entry_id):
     db.execute("DELETE FROM interessados WHERE id = ?", (entry_id,))
     db.commit()
     flash('Registro excluído.', 'success')
-    return redirect(url_for('admin'))
+    return redirect_admin('interessados')
 
 
 @app.route('/export.csv')
@@ -405,18 +1726,22 @@ def export_csv():
 def admin_upload():
     if 'file' not in request.files:
         flash('Nenhum arquivo selecionado.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('carrossel')
     file = request.files['file']
     if file.filename == '':
         flash('Nenhum arquivo selecionado.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('carrossel')
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
         file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+        mark_site_changed()
+        db = get_db()
+        save_image_metadata(db, filename)
+        db.commit()
         flash('Imagem enviada para o carrossel!', 'success')
     else:
         flash('Tipo de arquivo não permitido.', 'danger')
-    return redirect(url_for('admin'))
+    return redirect_admin('carrossel')
 
 # --- Excluir Imagem (Carrossel) ---
 @app.route('/admin/delete_image/<string:filename>', methods=['POST'])
@@ -427,24 +1752,26 @@ def admin_delete_image(filename):
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         if os.path.exists(filepath):
             os.remove(filepath)
+            mark_site_changed()
+            db = get_db()
+            delete_image_metadata(db, filename)
+            db.commit()
             flash(f'Imagem {filename} excluída.', 'success')
         else:
             flash('Arquivo não encontrado.', 'warning')
     except Exception as e:
         flash(f'Erro ao excluir imagem: {e}', 'danger')
         app.logger.error(f"Erro ao excluir imagem {filename}: {e}")
-    return redirect(url_for('admin'))
+    return redirect_admin('carrossel')
 
 # --- Atualizar Texto "Sobre" ---
 @app.route('/admin/update_sobre', methods=['POST'])
 @login_required
 def admin_update_sobre():
     texto = request.form.get('sobre_texto', DEFAULT_SOBRE_TEXTO)
-    db = get_db()
-    db.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", ('sobre_texto', texto))
-    db.commit()
+    set_config_many({'sobre_texto': texto})
     flash("Texto 'Sobre' atualizado.", 'success')
-    return redirect(url_for('admin'))
+    return redirect_admin('sobre')
 
 # --- Upload de Imagem "Sobre" ---
 @app.route('/admin/upload_sobre_imagem', methods=['POST'])
@@ -452,19 +1779,21 @@ def admin_update_sobre():
 def admin_upload_sobre_imagem():
     if 'file' not in request.files:
         flash('Nenhum arquivo selecionado.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('sobre')
     file = request.files['file']
     if file.filename == '':
         flash('Nenhum arquivo selecionado.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('sobre')
     if file and allowed_file(file.filename):
         db = get_db()
-        old_filename = get_sobre_data().get('imagem_filename')
+        old_filename = get_config().sobre_imagem_filename
         filename = secure_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
-        db.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", ('sobre_imagem_filename', filename))
-        db.commit()
+        save_image_metadata(db, filename)
+        if old_filename and old_filename != filename:
+            delete_image_metadata(db, old_filename)
+        set_config_many({'sobre_imagem_filename': filename})
         if old_filename and old_filename != filename:
             try:
                 old_filepath = os.path.join(app.config['UPLOAD_FOLDER'], old_filename)
@@ -475,28 +1804,24 @@ def admin_upload_sobre_imagem():
         flash('Imagem "Sobre" atualizada!', 'success')
     else:
         flash('Tipo de arquivo não permitido.', 'danger')
-    return redirect(url_for('admin'))
+    return redirect_admin('sobre')
 
 # --- Atualizar "Contatos" ---
 @app.route('/admin/update_contatos', methods=['POST'])
 @login_required
 def admin_update_contatos():
-    db = get_db()
     try:
         contatos = {
             'contato_endereco': request.form.get('contato_endereco', ''),
             'contato_email': request.form.get('contato_email', ''),
             'contato_telefones': request.form.get('contato_telefones', '')
         }
-        for key, value in contatos.items():
-            db.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, value))
-        db.commit()
+        set_config_many(contatos)
         flash("Informações de Contato atualizadas.", 'success')
     except Exception as e:
-        db.rollback()
         flash(f"Erro ao salvar contatos: {e}", 'danger')
         app.logger.error(f"Erro em admin_update_contatos: {e}")
-    return redirect(url_for('admin'))
+    return redirect_admin('contatos')
 
 # --- Rota "Background" (Fundo do Site) ---
 @app.route('/admin/upload_background', methods=['POST'])
@@ -504,19 +1829,21 @@ def admin_update_contatos():
 def admin_upload_background():
     if 'file' not in request.files:
         flash('Nenhum arquivo selecionado.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('fundo')
     file = request.files['file']
     if file.filename == '':
         flash('Nenhum arquivo selecionado.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('fundo')
     if file and allowed_file(file.filename):
         db = get_db()
-        old_filename = get_background_image()
+        old_filename = get_config().background_image_filename
         filename = secure_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
-        db.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", ('background_image_filename', filename))
-        db.commit()
+        save_image_metadata(db, filename)
+        if old_filename and old_filename != filename:
+            delete_image_metadata(db, old_filename)
+        set_config_many({'background_image_filename': filename})
         if old_filename and old_filename != filename:
             try:
                 old_filepath = os.path.join(app.config['UPLOAD_FOLDER'], old_filename)
@@ -527,13 +1854,13 @@ def admin_upload_background():
         flash('Imagem de fundo do site atualizada!', 'success')
     else:
         flash('Tipo de arquivo não permitido.', 'danger')
-    return redirect(url_for('admin'))
+    return redirect_admin('fundo')
 
 @app.route('/admin/delete_background', methods=['POST'])
 @login_required
 def admin_delete_background():
     db = get_db()
-    old_filename = get_background_image()
+    old_filename = get_config().background_image_filename
     if old_filename:
         try:
             old_filepath = os.path.join(app.config['UPLOAD_FOLDER'], old_filename)
@@ -541,10 +1868,11 @@ def admin_delete_background():
                 os.remove(old_filepath)
         except Exception as e:
             app.logger.error(f"Erro ao excluir imagem de fundo: {e}")
-    db.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", ('background_image_filename', None))
-    db.commit()
+    if old_filename:
+        delete_image_metadata(db, old_filename)
+    set_config_many({'background_image_filename': None})
     flash('Imagem de fundo removida. O site voltou para a cor amarela.', 'success')
-    return redirect(url_for('admin'))
+    return redirect_admin('fundo')
 
 # --- Rotas de Membros ---
 @app.route('/admin/membro/add', methods=['POST'])
@@ -554,7 +1882,7 @@ def admin_add_membro():
     email = request.form.get('email', '').strip()
     if not nome or not email:
         flash('Nome e E-mail são obrigatórios.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('membros')
     db = get_db()
     try:
         db.execute("INSERT INTO membros (nome, email) VALUES (?, ?)", (nome, email))
@@ -564,7 +1892,7 @@ def admin_add_membro():
         flash(f"Erro: O e-mail {email} já está cadastrado.", 'danger')
     except Exception as e:
         flash(f"Erro ao adicionar membro: {e}", 'danger')
-    return redirect(url_for('admin'))
+    return redirect_admin('membros')
 
 @app.route('/admin/membro/delete/<int:membro_id>', methods=['POST'])
 @login_required
@@ -576,7 +1904,7 @@ def admin_delete_membro(membro_id):
         flash('Membro excluído.', 'success')
     except Exception as e:
         flash(f"Erro ao excluir membro: {e}", 'danger')
-    return redirect(url_for('admin'))
+    return redirect_admin('membros')
 
 
 # --- Rotas de Projetos ---
@@ -587,10 +1915,10 @@ def admin_add_projeto():
     descricao = request.form.get('descricao', '').strip()
     if 'file' not in request.files or request.files['file'].filename == '':
         flash('Uma imagem é obrigatória para o projeto.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('projetos')
     if not titulo or not descricao:
         flash('Título e Descrição são obrigatórios.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('projetos')
     file = request.files['file']
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
@@ -601,11 +1929,12 @@ def admin_add_projeto():
             "INSERT INTO projetos (titulo, descricao, imagem_filename) VALUES (?, ?, ?)",
             (titulo, descricao, filename)
         )
+        save_image_metadata(db, 'projetos/' + filename)
         db.commit()
         flash(f'Projeto "{titulo}" criado!', 'success')
     else:
         flash('Tipo de arquivo não permitido.', 'danger')
-    return redirect(url_for('admin'))
+    return redirect_admin('projetos')
 
 @app.route('/admin/projeto/delete/<int:projeto_id>', methods=['POST'])
 @login_required
@@ -616,6 +1945,7 @@ def admin_delete_projeto(projeto_id):
     result = cursor.fetchone()
     if result:
         db.execute("DELETE FROM projetos WHERE id = ?", (projeto_id,))
+        delete_image_metadata(db, 'projetos/' + result['imagem_filename'])
         db.commit()
         try:
             filename = result['imagem_filename']
@@ -628,7 +1958,7 @@ def admin_delete_projeto(projeto_id):
             app.logger.error(f"Erro ao excluir arquivo de projeto: {e}")
     else:
         flash('Projeto não encontrado.', 'danger')
-    return redirect(url_for('admin'))
+    return redirect_admin('projetos')
 
 
 # --- Rotas de Gerenciamento de Equipe ---
@@ -730,11 +2060,11 @@ def admin_add_section():
     
     if not title or not text_content:
         flash('Título e Texto são obrigatórios.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('secoes')
         
     if 'file' not in request.files or request.files['file'].filename == '':
         flash('Uma imagem é obrigatória para a seção.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('secoes')
         
     file = request.files['file']
     
@@ -759,6 +2089,7 @@ def admin_add_section():
                 "INSERT INTO custom_sections (title, slug, text_content, image_filename, display_order) VALUES (?, ?, ?, ?, ?)",
                 (title, slug, text_content, filename, new_order)
             )
+            save_image_metadata(db, 'custom/' + filename)
             db.commit()
             flash(f'Nova seção "{title}" criada!', 'success')
         except sqlite3.IntegrityError:
@@ -768,7 +2099,7 @@ def admin_add_section():
     else:
         flash('Tipo de arquivo não permitido.', 'danger')
 
-    return redirect(url_for('admin'))
+    return redirect_admin('secoes')
 
 
 @app.route('/admin/section/delete/<int:section_id>', methods=['POST'])
@@ -781,6 +2112,7 @@ def admin_delete_section(section_id):
     
     if result:
         db.execute("DELETE FROM custom_sections WHERE id = ?", (section_id,))
+        delete_image_metadata(db, 'custom/' + result['image_filename'])
         db.commit()
         
         try:
@@ -795,7 +2127,7 @@ def admin_delete_section(section_id):
     else:
         flash('Seção não encontrada.', 'danger')
 
-    return redirect(url_for('admin'))
+    return redirect_admin('secoes')
 
 # --- NOVO: Rotas da Galeria "Nossa Galera" ---
 
@@ -804,13 +2136,13 @@ def admin_delete_section(section_id):
 def admin_add_gallery_image():
     if 'file' not in request.files:
         flash('Nenhum arquivo selecionado.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('galeria')
     
     file = request.files['file']
     
     if file.filename == '':
         flash('Nenhum arquivo selecionado.', 'danger')
-        return redirect(url_for('admin'))
+        return redirect_admin('galeria')
         
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
@@ -829,6 +2161,7 @@ def admin_add_gallery_image():
                 "INSERT INTO gallery_images (filename, display_order) VALUES (?, ?)",
                 (filename, new_order)
             )
+            save_image_metadata(db, 'gallery/' + filename)
             db.commit()
             flash('Nova foto adicionada à galeria "Nossa Galera"!', 'success')
         except Exception as e:
@@ -836,7 +2169,7 @@ def admin_add_gallery_image():
     else:
         flash('Tipo de arquivo não permitido.', 'danger')
 
-    return redirect(url_for('admin'))
+    return redirect_admin('galeria')
 
 
 @app.route('/admin/gallery/delete/<int:image_id>', methods=['POST'])
@@ -849,6 +2182,7 @@ def admin_delete_gallery_image(image_id):
     
     if result:
         db.execute("DELETE FROM gallery_images WHERE id = ?", (image_id,))
+        delete_image_metadata(db, 'gallery/' + result['filename'])
         db.commit()
         
         try:
@@ -863,7 +2197,293 @@ def admin_delete_gallery_image(image_id):
     else:
         flash('Foto da galeria não encontrada.', 'danger')
 
-    return redirect(url_for('admin'))
+    return redirect_admin('galeria')
+
+
+# ----------- Comandos (CLI) -----------
+
+@app.cli.command('backfill-image-metadata')
+def backfill_image_metadata_command():
+    """Gera os metadados das imagens já existentes em static/uploads."""
+    init_db()
+    db = get_db()
+    total = 0
+    for root, dirs, files in os.walk(app.config['UPLOAD_FOLDER']):
+        for f in files:
+            if not allowed_file(f):
+                continue
+            relpath = os.path.relpath(os.path.join(root, f), app.config['UPLOAD_FOLDER']).replace(os.sep, '/')
+            if save_image_metadata(db, relpath):
+                total += 1
+    db.commit()
+    print(f"Metadados gerados para {total} imagem(ns).")
+    republish_if_enabled()
+
+
+@app.cli.command('backfill-rollups')
+def backfill_rollups_command():
+    """Recalcula as estatísticas de interessados (por dia/semana/tipo) a partir dos registros existentes."""
+    init_db()
+    backfill_rollups(get_db())
+    print("Rollups de interessados recalculados.")
+
+
+@app.cli.command('set-admin-password')
+@click.option('--username', default=None, help='Também troca o nome de usuário do admin.')
+@click.password_option(help='Nova senha (é pedida no terminal se omitida).')
+def set_admin_password_command(username, password):
+    """Grava no banco o hash da nova senha do admin."""
+    init_db()
+    values = {'admin_password_hash': generate_password_hash(password)}
+    if username:
+        values['admin_username'] = username
+    set_config_many(values)
+    print("Credenciais do admin atualizadas.")
+
+
+@app.cli.command('profile-startup')
+def profile_startup_command():
+    """Mostra o tempo de import e de inicialização do app, por fase."""
+    # Num interpretador novo: aqui o próprio 'flask' já importou Flask/Click antes do app.py,
+    # e o import do Flask/Werkzeug sairia como 0 ms
+    script = ("import app\n"
+              "with app.app.app_context():\n"
+              "    app.profile_initialization()\n"
+              "print(app.startup_report())\n")
+    result = subprocess.run([sys.executable, '-c', script], cwd=app.root_path)
+    if result.returncode:
+        raise click.ClickException("Falha ao medir a inicialização.")
+
+
+@app.cli.command('publish')
+def publish_command():
+    """Gera o HTML estático da página inicial (modo STATIC_PUBLISH=1)."""
+    init_db()
+    print(f"Página inicial publicada em {publish_index()}")
+
+
+@app.cli.command('vendor-assets')
+def vendor_assets_command():
+    """Baixa para static/vendor as bibliotecas de terceiros (Bootstrap, Popper, Inter) que ainda faltam."""
+    from urllib.request import urlopen
+    import zipfile
+    for relpath, source_url in VENDOR_ASSETS.items():
+        path = os.path.join(VENDOR_FOLDER, relpath)
+        if os.path.exists(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urlopen(source_url) as resp, open(path, 'wb') as fh:
+            fh.write(resp.read())
+        print(f"{relpath} <- {source_url}")
+
+    # Inter: mesma origem e mesmo subset dos arquivos versionados
+    missing = [relpath for relpath in VENDOR_FONTS if not os.path.exists(os.path.join(VENDOR_FOLDER, relpath))]
+    if missing:
+        wheel_url, wheel_sha256 = INTER_SOURCE_WHEEL
+        with urlopen(wheel_url) as resp:
+            data = resp.read()
+        if hashlib.sha256(data).hexdigest() != wheel_sha256:
+            raise click.ClickException(f"Hash inesperado em {wheel_url}")
+        with zipfile.ZipFile(BytesIO(data)) as wheel:
+            for relpath in missing:
+                path = os.path.join(VENDOR_FOLDER, relpath)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                subset_font_woff2(BytesIO(wheel.read(VENDOR_FONTS[relpath])), path)
+                print(f"{relpath} <- {VENDOR_FONTS[relpath]} ({wheel_url.rsplit('/', 1)[-1]})")
+
+
+@app.cli.command('build-static')
+def build_static_command():
+    """Converte as fontes para WOFF2 (com subset), gera o bundle de CSS/JS e pré-comprime os estáticos em .gz/.br."""
+    static_folder = app.static_folder
+    fonts_folder = os.path.join(static_folder, 'fonts')
+
+    # 1. Fontes: TTF/OTF -> WOFF2 só com os caracteres usados no site
+    for f in sorted(os.listdir(fonts_folder)):
+        name, ext = os.path.splitext(f)
+        if ext.lower() not in ('.ttf', '.otf'):
+            continue
+        out = os.path.join(fonts_folder, name + '.woff2')
+        subset_font_woff2(os.path.join(fonts_folder, f), out)
+        click.echo(f"{f} -> {name}.woff2 ({os.path.getsize(os.path.join(fonts_folder, f))} -> {os.path.getsize(out)} bytes)")
+
+    # 2. Bundle único (Bootstrap + Inter + style.css) com hash no nome e CSS crítico para inline
+    manifest, sizes = build_asset_bundle()
+    for relpath, size in sizes.items():
+        click.echo(f"{relpath}: {size} bytes")
+
+    # 3. Pré-compressão dos arquivos de texto (e fontes sem compressão própria)
+    uploads = os.path.abspath(app.config['UPLOAD_FOLDER'])
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root).startswith(uploads):
+            continue
+        for f in files:
+            if f.rsplit('.', 1)[-1].lower() not in PRECOMPRESS_EXTENSIONS:
+                continue
+            path = os.path.join(root, f)
+            with open(path, 'rb') as fh:
+                data = fh.read()
+            write_precompressed(path, data)
+            click.echo(f"{os.path.relpath(path, static_folder)}: {len(data)} -> {os.path.getsize(path + '.br')} bytes (br)")
+
+    # 4. O HTML publicado aponta para o bundle com hash: precisa ser regerado
+    republish_if_enabled()
+
+
+@app.cli.command('backup')
+def backup_command():
+    """Gera um snapshot do banco e de static/uploads (sem parar o site) e aplica a retenção."""
+    init_db() # Garante o modo WAL mesmo se o site ainda não foi reiniciado com esta versão
+    manifest = create_snapshot()
+    stats = manifest['stats']
+    print(f"Snapshot {manifest['id']}: {stats['new_objects']} objeto(s) novo(s), "
+          f"{stats['new_bytes']} bytes gravados em {stats['seconds']}s")
+
+
+@app.cli.command('archive-wal')
+def archive_wal_command():
+    """Arquiva as transações do WAL confirmadas desde a última execução (restauração até um ponto no tempo)."""
+    if get_db().execute("PRAGMA journal_mode").fetchone()[0] != 'wal':
+        raise click.ClickException("O banco não está em modo WAL: rode 'flask backup' (ou reinicie o site) antes.")
+    frames = archive_wal()
+    print(f"{frames} página(s) do WAL arquivada(s).")
+
+
+@app.cli.command('list-backups')
+def list_backups_command():
+    """Lista os snapshots disponíveis."""
+    for snapshot_id in list_snapshots():
+        manifest = load_snapshot(snapshot_id)
+        segments = list_wal_segments(snapshot_id)
+        last = f" (até {backup_timestamp(segments[-1][:-len('.wal')]):%Y-%m-%d %H:%M:%S})" if segments else ''
+        print(f"{snapshot_id}  banco: {manifest['database']['size']} bytes  uploads: {len(manifest['uploads'])} arquivo(s)"
+              f"  WAL: {len(segments)} segmento(s){last}")
+
+
+@app.cli.command('restore-backup')
+@click.argument('snapshot_id', default='latest')
+@click.option('--ate', type=click.DateTime(), default=None,
+              help='Restaura o banco como estava neste momento (UTC), pelo WAL arquivado. Ex: 2026-10-19T15:30:00')
+def restore_backup_command(snapshot_id, ate):
+    """Restaura o banco e static/uploads a partir de um snapshot (o mais recente por padrão), mais as
+    transações do WAL arquivadas depois dele."""
+    until = ate.replace(tzinfo=timezone.utc) if ate else None
+    if snapshot_id == 'latest':
+        snapshots = [s for s in list_snapshots() if until is None or backup_timestamp(s) <= until]
+        if not snapshots:
+            raise click.ClickException("Nenhum snapshot encontrado.")
+        snapshot_id = snapshots[-1]
+    init_db()
+    db = get_db()
+    # Versões dos painéis do admin: as restauradas precisam ficar acima de todas as já servidas
+    offset = (db.execute("SELECT MAX(version) FROM admin_panel_versions").fetchone()[0] or 0) + 1
+    t0 = time.perf_counter()
+    restored, segments = restore_snapshot(snapshot_id, until=until)
+    init_db() # Snapshot antigo pode não ter as tabelas mais novas
+    db.executemany("INSERT INTO admin_panel_versions (panel, version) VALUES (?, ?) "
+                   "ON CONFLICT (panel) DO UPDATE SET version = version + excluded.version",
+                   [(name, offset) for name in ADMIN_PANELS])
+    db.commit()
+    print(f"Snapshot {snapshot_id} restaurado em {time.perf_counter() - t0:.2f}s "
+          f"({segments} segmento(s) do WAL aplicado(s), {restored} upload(s) regravado(s)).")
+    republish_if_enabled()
+
+
+@app.cli.command('verify-backup')
+@click.argument('snapshot_id', default='latest')
+def verify_backup_command(snapshot_id):
+    """Restaura um snapshot numa pasta temporária e confere banco, contagens e uploads (sai com erro se falhar)."""
+    if snapshot_id == 'latest':
+        snapshots = list_snapshots()
+        if not snapshots:
+            raise click.ClickException("Nenhum snapshot encontrado.")
+        snapshot_id = snapshots[-1]
+    try:
+        seconds = verify_snapshot(snapshot_id)
+    except (RuntimeError, sqlite3.Error, OSError) as e:
+        raise click.ClickException(f"Snapshot {snapshot_id} inválido: {e}")
+    print(f"Snapshot {snapshot_id} OK (restauração em {seconds:.3f}s).")
+
+
+@app.cli.command('measure-backup')
+@click.option('--writes', default=200, help='Escritas medidas sem backup (com backup, escreve até ele terminar).')
+@click.option('--interval', default=0.005, help='Pausa entre as escritas simuladas (segundos).')
+@click.option('--seed-mb', default=8, help='Tamanho (MB) acrescentado à cópia do banco, para a cópia em passos levar tempo de verdade.')
+def measure_backup_command(writes, interval, seed_mb):
+    """Mede, numa cópia temporária do banco, o atraso que o backup causa nas escritas e o tempo de
+    restauração, e confere a restauração (sai com erro se o snapshot não bater com o banco)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'database.db')
+        backup_folder = os.path.join(tmp, 'backups')
+        copy_database_online(DATABASE, db_path)
+        seed = sqlite3.connect(db_path)
+        seed.execute("CREATE TABLE _measure_seed (data BLOB)")
+        seed.execute("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?) "
+                     "INSERT INTO _measure_seed SELECT randomblob(1024) FROM n", (seed_mb * 1024,))
+        seed.commit()
+        seed.close()
+
+        def write_latencies(count, stop=None):
+            conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+            conn.execute("CREATE TABLE IF NOT EXISTS _measure (data BLOB)")
+            latencies = []
+            while len(latencies) < count or (stop is not None and not stop.is_set()):
+                t = time.perf_counter()
+                conn.execute("INSERT INTO _measure VALUES (randomblob(256))")
+                latencies.append(time.perf_counter() - t)
+                time.sleep(interval)
+            conn.close()
+            return latencies
+
+        def summary(latencies):
+            latencies = sorted(latencies)
+            pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+            return f"{len(latencies)} escritas, p50 {pick(0.5):.2f} ms, p95 {pick(0.95):.2f} ms, máx {latencies[-1] * 1000:.2f} ms"
+
+        baseline = write_latencies(writes)
+        stop = threading.Event()
+        during = []
+        writer = threading.Thread(target=lambda: during.extend(write_latencies(1, stop)))
+        writer.start()
+        first = create_snapshot(db_path, backup_folder=backup_folder)
+        stop.set()
+        writer.join()
+        second = create_snapshot(db_path, backup_folder=backup_folder)
+
+        # O escritor parou: o último snapshot tem que bater com o banco de origem
+        if second['database']['rows'] != table_row_counts(db_path):
+            raise click.ClickException("Snapshot não bate com o banco de origem.")
+        try:
+            restore_seconds = verify_snapshot(second['id'], backup_folder)
+        except RuntimeError as e:
+            raise click.ClickException(f"Restauração inválida: {e}")
+
+    print(f"Escritas sem backup:  {summary(baseline)}")
+    print(f"Escritas com backup:  {summary(during)}")
+    print(f"Snapshot completo:    {first['stats']['seconds']}s, {first['stats']['new_bytes']} bytes, {first['stats']['restarts']} reinício(s)")
+    print(f"Snapshot incremental: {second['stats']['seconds']}s, {second['stats']['new_bytes']} bytes novos")
+    print(f"Restauração:          {restore_seconds:.3f}s (banco de {second['database']['size']} bytes + {len(second['uploads'])} upload(s)), conferida")
+
+
+# ----------- Perfil de Inicialização -----------
+
+mark_startup_phase('definição do app (configuração, rotas e hooks)')
+
+def profile_initialization():
+    """Executa (e cronometra) o init_db e a compilação de todos os templates."""
+    _startup_last[0] = time.perf_counter()
+    init_db()
+    mark_startup_phase('init_db')
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    mark_startup_phase('carregamento dos templates')
+
+def startup_report():
+    lines = ['Perfil de inicialização:']
+    for name, seconds in STARTUP_PHASES:
+        lines.append(f"  {name:<50} {seconds * 1000:8.1f} ms")
+    lines.append(f"  {'total':<50} {sum(seconds for _, seconds in STARTUP_PHASES) * 1000:8.1f} ms")
+    return '\n'.join(lines)
 
 
 # ----------- Main -----------
@@ -871,5 +2491,12 @@ def admin_delete_gallery_image(image_id):
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO) # Adiciona log
     with app.app_context():
-        init_db()
+        if os.environ.get('STARTUP_PROFILE') == '1':
+            profile_initialization()
+            print(startup_report(), file=sys.stderr)
+        else:
+            init_db()
+    # Com debug=True o código roda duas vezes (reloader); a thread de backup só no processo que serve
+    if app.config['BACKUP_INTERVAL'] and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_backup_thread(app.config['BACKUP_INTERVAL'], app.config['BACKUP_WAL_INTERVAL'])
     app.run(debug=True)
@@ -0,0 +1,122 @@
+"""Testes do backup online (snapshots + WAL arquivado). Rodar dentro de ong/: python -m pytest"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import app as ong
+
+ROWS = 2000 # ~2 MB: a cópia em passos de BACKUP_STEP_PAGES páginas leva vários passos
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Banco em WAL e pasta de uploads temporários. A conexão fica aberta durante o teste, como a do
+    servidor: sem ela o SQLite apagaria o -wal ao fechar a última conexão."""
+    db_path = str(tmp_path / 'database.db')
+    uploads = tmp_path / 'uploads'
+    (uploads / 'projetos').mkdir(parents=True)
+    (uploads / 'carrossel.jpg').write_bytes(os.urandom(8192))
+    (uploads / 'projetos' / 'capa.png').write_bytes(os.urandom(4096))
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE interessados (id INTEGER PRIMARY KEY, nome TEXT, dados BLOB)")
+    conn.execute("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?) "
+                 "INSERT INTO interessados (nome, dados) SELECT 'pessoa ' || i, randomblob(1024) FROM n", (ROWS,))
+    yield conn, db_path, str(uploads), str(tmp_path / 'backups')
+    conn.close()
+
+
+def insert(conn, nome):
+    conn.execute("INSERT INTO interessados (nome) VALUES (?)", (nome,))
+
+
+def restored_names(tmp_path, backup_folder, snapshot_id, until=None):
+    db_path = str(tmp_path / f'restaurado-{time.perf_counter_ns()}.db')
+    ong.restore_snapshot(snapshot_id, db_path, str(tmp_path / 'restaurado-uploads'), backup_folder, until)
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0] for row in conn.execute("SELECT nome FROM interessados WHERE dados IS NULL")}
+    finally:
+        conn.close()
+
+
+def test_snapshot_incremental_e_restauracao_conferida(site):
+    conn, db_path, uploads, backup_folder = site
+    first = ong.create_snapshot(db_path, uploads, backup_folder)
+    assert first['database']['rows'] == {'interessados': ROWS}
+    assert set(first['uploads']) == {'carrossel.jpg', 'projetos/capa.png'}
+    assert first['stats']['new_bytes'] >= first['database']['size']
+
+    insert(conn, 'nova')
+    second = ong.create_snapshot(db_path, uploads, backup_folder)
+    assert second['database']['rows'] == {'interessados': ROWS + 1}
+    # Só os pedaços alterados do banco são gravados de novo; os uploads nem são relidos
+    assert 0 < second['stats']['new_bytes'] <= first['stats']['new_bytes'] // 4
+
+    restore_seconds = ong.verify_snapshot(second['id'], backup_folder)
+    assert restore_seconds < 5
+
+
+def test_backup_nao_trava_as_escritas(site):
+    conn, db_path, uploads, backup_folder = site
+    stop = threading.Event()
+    latencies = []
+
+    def writer():
+        w = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        while not stop.is_set():
+            t = time.perf_counter()
+            insert(w, 'escrita')
+            latencies.append(time.perf_counter() - t)
+            time.sleep(0.002)
+        w.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        manifest = ong.create_snapshot(db_path, uploads, backup_folder)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert latencies
+    assert max(latencies) < 0.5
+    assert manifest['stats']['restarts'] <= ong.BACKUP_MAX_RESTARTS + 1
+    ong.verify_snapshot(manifest['id'], backup_folder)
+
+
+def test_wal_arquivado_restaura_ate_um_ponto_no_tempo(site, tmp_path):
+    conn, db_path, uploads, backup_folder = site
+    snapshot = ong.create_snapshot(db_path, uploads, backup_folder)
+
+    insert(conn, 'antes')
+    assert ong.archive_wal(db_path, backup_folder) > 0
+    assert ong.archive_wal(db_path, backup_folder) == 0 # Nada novo desde o último arquivamento
+    middle = datetime.now(timezone.utc)
+    insert(conn, 'depois')
+    assert ong.archive_wal(db_path, backup_folder) > 0
+
+    assert ong.list_snapshots(backup_folder) == [snapshot['id']]
+    assert len(ong.list_wal_segments(snapshot['id'], backup_folder)) == 2
+    assert restored_names(tmp_path, backup_folder, snapshot['id']) == {'antes', 'depois'}
+    assert restored_names(tmp_path, backup_folder, snapshot['id'], until=middle) == {'antes'}
+    ong.verify_snapshot(snapshot['id'], backup_folder)
+
+
+def test_wal_recomecado_antes_do_arquivamento_gera_snapshot(site, tmp_path):
+    conn, db_path, uploads, backup_folder = site
+    ong.create_snapshot(db_path, uploads, backup_folder)
+    insert(conn, 'antes')
+    ong.archive_wal(db_path, backup_folder)
+    insert(conn, 'perdida')
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)") # O -wal recomeça sem a 'perdida' arquivada
+    insert(conn, 'depois')
+
+    assert ong.archive_wal(db_path, backup_folder) == 0
+    snapshots = ong.list_snapshots(backup_folder)
+    assert len(snapshots) == 2
+    assert restored_names(tmp_path, backup_folder, snapshots[-1]) == {'antes', 'perdida', 'depois'}